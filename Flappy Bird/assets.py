@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import time
+
+import pygame
+
+# Precompiled asset cache.
+#
+# 'build' packs every sprite in gallery/sprites (plus pre-rotated pipes)
+# into one atlas stored as raw RGBA, with a JSON index of sprite rects and
+# bird flap frames, and pre-decodes the WAV sounds into raw samples in the
+# mixer's format. At startup loadCache() reads the atlas with one
+# frombuffer call and hands out subsurfaces, and builds sounds straight
+# from the raw samples. It returns None when the cache is missing or older
+# than its sources, and the game then loads the original files.
+#
+# Usage (from the repo root): python "Flappy Bird/assets.py" build
+
+SPRITES_DIR = 'gallery/sprites'
+AUDIO_DIR = 'gallery/audio'
+CACHE_DIR = 'gallery/cache'
+INDEX_FILE = 'index.json'
+ATLAS_FILE = 'atlas.rgba'
+CACHE_VERSION = 1
+ROTATED = '@180'  # Name suffix of sprites pre-rotated by 180 degrees
+PADDING = 1
+
+
+def spriteName(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def sourceFiles():
+    files = [os.path.join(SPRITES_DIR, f) for f in sorted(os.listdir(SPRITES_DIR)) if f.endswith('.png')]
+    files += [os.path.join(AUDIO_DIR, f) for f in sorted(os.listdir(AUDIO_DIR)) if f.endswith('.wav')]
+    return files
+
+
+def sourceStamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def packRects(sizes, width):
+    # Shelf packing, tallest first. sizes: {name: (w, h)} -> {name: (x, y)}
+    positions = {}
+    x = y = shelf = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        positions[name] = (x, y)
+        x += w + PADDING
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+
+def build(cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    index = {'version': CACHE_VERSION, 'sources': {}, 'sprites': {}, 'birds': {}, 'sounds': {}}
+
+    images = {}
+    for path in sourceFiles():
+        index['sources'][path] = sourceStamp(path)
+        if path.endswith('.png'):
+            images[spriteName(path)] = pygame.image.load(path).convert_alpha()
+    for name in [name for name in images if name.startswith('pipe-')]:
+        images[name + ROTATED] = pygame.transform.rotate(images[name], 180)
+
+    for name in images:
+        bird, _, frame = name.partition('-')
+        if bird.endswith('bird') and frame.endswith('flap'):
+            index['birds'].setdefault(bird, []).append(name)
+    flap_order = ['upflap', 'midflap', 'downflap']
+    for frames in index['birds'].values():
+        frames.sort(key=lambda name: flap_order.index(name.partition('-')[2]))
+
+    width = 1024
+    positions, height = packRects({name: image.get_size() for name, image in images.items()}, width)
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    for name, (x, y) in positions.items():
+        atlas.blit(images[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        index['sprites'][name] = [x, y, *images[name].get_size()]
+    with open(os.path.join(cache_dir, ATLAS_FILE), 'wb') as f:
+        f.write(pygame.image.tobytes(atlas, 'RGBA'))
+    index['atlas'] = {'file': ATLAS_FILE, 'size': [width, height]}
+
+    index['mixer'] = list(pygame.mixer.get_init())
+    for path in sourceFiles():
+        if path.endswith('.wav'):
+            name = spriteName(path)
+            with open(os.path.join(cache_dir, name + '.pcm'), 'wb') as f:
+                f.write(pygame.mixer.Sound(path).get_raw())
+            index['sounds'][name] = name + '.pcm'
+
+    with open(os.path.join(cache_dir, INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+class AssetCache:
+
+    def __init__(self, cache_dir, index):
+        self.cache_dir = cache_dir
+        self.index = index
+        width, height = index['atlas']['size']
+        with open(os.path.join(cache_dir, index['atlas']['file']), 'rb') as f:
+            self.atlas = pygame.image.frombuffer(f.read(), (width, height), 'RGBA').convert_alpha()
+        self.sprites = {}
+
+    def sprite(self, name):
+        if name not in self.sprites:
+            self.sprites[name] = self.atlas.subsurface(self.index['sprites'][name])
+        return self.sprites[name]
+
+    def birdFrames(self, bird):
+        return tuple(self.sprite(name) for name in self.index['birds'][bird])
+
+    def sound(self, name):
+        # Raw samples are only valid for the mixer format they were decoded for
+        if list(pygame.mixer.get_init() or []) != self.index['mixer']:
+            return pygame.mixer.Sound(os.path.join(AUDIO_DIR, name + '.wav'))
+        with open(os.path.join(self.cache_dir, self.index['sounds'][name]), 'rb') as f:
+            return pygame.mixer.Sound(buffer=f.read())
+
+
+def loadCache(cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != CACHE_VERSION:
+        return None
+    try:
+        if any(sourceStamp(path) != stamp for path, stamp in index['sources'].items()):
+            return None
+    except OSError:
+        return None
+    return AssetCache(cache_dir, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the sprite atlas and decoded audio cache")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.mixer.init()
+    pygame.display.set_mode((1, 1))
+    start = time.perf_counter()
+    index = build(args.cache_dir)
+    width, height = index['atlas']['size']
+    print(f"{len(index['sprites'])} sprites in a {width}x{height} atlas, {len(index['sounds'])} sounds "
+          f"at {index['mixer']} -> {args.cache_dir} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
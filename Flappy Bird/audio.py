@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pygame
+
+# Sound effects loaded on a background thread and played through a fixed
+# pool of mixer channels.
+#
+# play() never blocks and never raises: a sound that is not loaded yet is
+# skipped, a repeat within DEDUPE_WINDOW of the last start is ignored, a
+# sound already using its voice limit is dropped, and when every channel is
+# busy the lowest-priority voice is cut if it ranks below the new sound.
+# Every outcome is counted in stats(). A sound that fails to load is
+# counted (load_failed) and reported, and the rest still load.
+
+PRIORITIES = {
+    'hit': 3,
+    'die': 3,
+    'new_high_score': 3,
+    'point': 2,
+    'wing': 1,
+    'swoosh': 1,
+}
+VOICE_LIMITS = {
+    'wing': 2,
+    'point': 2,
+}
+DEDUPE_WINDOW = 0.05  # seconds
+
+
+class AudioManager:
+
+    def __init__(self, sounds=None, channels=8, priorities=PRIORITIES, voice_limits=VOICE_LIMITS):
+        # sounds: dict filled in as sounds finish loading (e.g. GAME_SOUNDS)
+        self.sounds = {} if sounds is None else sounds
+        self.num_channels = channels
+        self.priorities = priorities
+        self.voice_limits = voice_limits
+        self.channels = []
+        self.voices = {}  # channel index -> (name, priority)
+        self.last_start = {}
+        self.thread = None
+        self.counters = {'played': 0, 'not_loaded': 0, 'deduped': 0,
+                         'voice_limit': 0, 'no_channel': 0, 'preempted': 0, 'load_failed': 0}
+
+    def load(self, loaders, background=True):
+        # loaders: {name: callable returning a pygame.mixer.Sound}
+        if not self.channels and pygame.mixer.get_init():
+            pygame.mixer.set_num_channels(self.num_channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+
+        def work():
+            for name, loader in loaders.items():
+                try:
+                    self.sounds[name] = loader()
+                except Exception as e:  # Missing or corrupt file, mixer error: play() skips this one
+                    self.counters['load_failed'] += 1
+                    print(f"Error loading sound {name}: {e}")
+
+        if background:
+            self.thread = threading.Thread(target=work, name='audio-loader', daemon=True)
+            self.thread.start()
+        else:
+            work()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def loaded(self):
+        return self.thread is None or not self.thread.is_alive()
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None or not self.channels:
+            self.counters['not_loaded'] += 1
+            return None
+
+        now = time.perf_counter()
+        if now - self.last_start.get(name, -DEDUPE_WINDOW) < DEDUPE_WINDOW:
+            self.counters['deduped'] += 1
+            return None
+
+        # Forget voices that have finished
+        for index in [index for index in self.voices if not self.channels[index].get_busy()]:
+            del self.voices[index]
+
+        if sum(1 for voice, _ in self.voices.values() if voice == name) >= self.voice_limits.get(name, 1):
+            self.counters['voice_limit'] += 1
+            return None
+
+        priority = self.priorities.get(name, 0)
+        free = [index for index in range(len(self.channels)) if index not in self.voices]
+        if free:
+            index = free[0]
+        else:
+            index = min(self.voices, key=lambda i: self.voices[i][1])
+            if self.voices[index][1] >= priority:
+                self.counters['no_channel'] += 1
+                return None
+            self.channels[index].stop()
+            self.counters['preempted'] += 1
+
+        channel = self.channels[index]
+        channel.play(sound)
+        self.voices[index] = (name, priority)
+        self.last_start[name] = now
+        self.counters['played'] += 1
+        return channel
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['voices'] = sum(1 for index in self.voices if self.channels[index].get_busy())
+        stats['loaded'] = len(self.sounds)
+        return stats
+
+    def resetStats(self):
+        for key in self.counters:
+            self.counters[key] = 0
@@ -0,0 +1,288 @@
+import argparse
+import json
+import math
+import os
+import time
+from array import array
+
+import numpy as np
+
+from engine import SCREENWIDTH, DIFFICULTY_SETTINGS, PLAYER_HEIGHT, PIPE_WIDTH
+import reach
+
+# A bird that plays by table lookup.
+#
+# The table holds, for every gap center, every number of frames left until
+# the bird is past that gap's column and every velocity, the lowest bird y
+# at which gliding is still safe: the bird flaps when it is below that.
+# It comes from the same backward pass as reach.py. Gliding is safe when
+# the state after a glide can still get through the gap and leave it the
+# way reach.py expects. Where no glide is safe the bird aims its middle at
+# the gap center. One decision is a few arithmetic operations and one array
+# read, so the bird costs nothing at 32 FPS, and decideBatch() runs
+# millions of decisions per second on a batch.BatchWorld.
+#
+# Tables are built once per difficulty and cached in gallery/cache, one
+# file per configuration (tablePath).
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/autopilot.py" report --envs 1000 --frames 20000  (survival per difficulty)
+#   python "Flappy Bird/autopilot.py" soak --minutes 10  (the real game loop, autopilot playing)
+#   python "Flappy Bird/autopilot.py" attract  (a key pressed during a demo ends it; exits 1 if not)
+
+TABLE_VERSION = 1
+SURVIVAL_FRAMES = 20000  # A game still going after this many frames counts as survived
+SOAK_GAME_FRAMES = 3000  # The autopilot lets go after this many frames so soak games end
+
+TABLES = {}  # (difficulty, params) -> Autopilot, tables already loaded by this process
+
+
+class Autopilot:
+    # Callable as a policy: autopilot(world) is True to flap
+
+    def __init__(self, difficulty, thresholds, min_center, vmin, pipe_speed):
+        self.difficulty = difficulty
+        self.centers, self.depths, self.velocities = thresholds.shape
+        self.thresholds = thresholds
+        self.flat = array('h', thresholds.ravel().tolist())
+        self.min_center = min_center
+        self.vmin = vmin
+        self.pipe_speed = pipe_speed
+        self.column_left = int(SCREENWIDTH / 5) - PIPE_WIDTH
+
+    def __call__(self, world):
+        # Same pipe as world.nextPipe(), read straight from the store
+        pipes = world.pipes
+        xs = pipes.x
+        for i in pipes.order:
+            if xs[i] > self.column_left:
+                break
+        return self.decide(world.playery, world.bird_velocity_y, xs[i], pipes.gap_top[i], pipes.gap_bottom[i])
+
+    def decide(self, playery, velocity, x, gap_top, gap_bottom):
+        c = int(gap_top + gap_bottom) // 2 - self.min_center
+        c = 0 if c < 0 else c if c < self.centers else self.centers - 1
+        d = math.ceil((x - self.column_left) / self.pipe_speed) + reach.SLACK_FRAMES
+        if d >= self.depths:
+            d = self.depths - 1
+        v = int(velocity) - self.vmin
+        v = 0 if v < 0 else v if v < self.velocities else self.velocities - 1
+        return playery > self.flat[(c * self.depths + d) * self.velocities + v]
+
+    def decideBatch(self, obs):
+        # obs: batch.BatchWorld.observe() rows (y, velocity, distance, gap center)
+        y, velocity, distance, center = obs.T
+        c = np.clip(center.astype(np.intp) - self.min_center, 0, self.centers - 1)
+        d = np.minimum(np.ceil((distance + PIPE_WIDTH) / self.pipe_speed).astype(np.intp) + reach.SLACK_FRAMES,
+                       self.depths - 1)
+        v = np.clip(velocity.astype(np.intp) - self.vmin, 0, self.velocities - 1)
+        return y > self.thresholds[c, d, v]
+
+
+def buildThresholds(difficulty, settings=None):
+    params = reach.tableParams(difficulty, settings)
+    space = reach.StateSpace(params['gravity'], params['flap_velocity'], params['max_velocity_y'])
+    pipe_gap, pipe_speed = params['pipe_gap'], params['pipe_speed']
+    centers = reach.gapCenters(pipe_gap)
+    column = reach.columnFrames(pipe_speed)
+    depths = reach.framesToLeave(SCREENWIDTH + 200, pipe_speed) + 1
+    in_gap, exits = reach.gapStates(space, centers, pipe_gap)
+    alive = np.ones(space.size, dtype=bool)
+    ny = space.ymax - space.ymin + 1
+
+    thresholds = np.zeros((len(centers), depths, space.nv), dtype=np.int16)
+    for i, center in enumerate(centers):
+        aim = center - PLAYER_HEIGHT // 2
+        thresholds[i, 0] = aim
+        states = exits[i]
+        for depth in range(1, depths):
+            # Lowest y per velocity whose glide lands in a state that still makes it
+            safe = np.append(states, False)[space.glide].reshape(ny, space.nv)
+            lowest = ny - 1 - np.argmax(safe[::-1], axis=0)
+            thresholds[i, depth] = np.where(safe.any(axis=0), space.ymin + lowest, aim)
+            states = space.back(states) & (in_gap[i] if depth < column else alive)
+    return {'thresholds': thresholds, 'min_center': int(centers[0]), 'vmin': space.vmin, 'pipe_speed': pipe_speed}
+
+
+def tableParams(difficulty, settings=None):
+    return dict(reach.tableParams(difficulty, settings), autopilot=TABLE_VERSION)
+
+
+def tablePath(difficulty, settings=None, cache_dir=reach.CACHE_DIR):
+    # One file per configuration, as for the reach tables
+    params = tableParams(difficulty, settings)
+    return os.path.join(cache_dir, f'autopilot-{difficulty}-{reach.paramsHash(params)}.npz')
+
+
+def load(difficulty, settings=None, cache_dir=reach.CACHE_DIR):
+    # Autopilot for these settings, its table built (and cached) when missing or stale
+    params = tableParams(difficulty, settings)
+    key = (difficulty, json.dumps(params, sort_keys=True))
+    if key in TABLES:
+        return TABLES[key]
+    path = tablePath(difficulty, settings, cache_dir)
+    table = None
+    try:
+        with np.load(path) as data:
+            if json.loads(str(data['params'])) == params:
+                table = {name: data[name] if name == 'thresholds' else int(data[name])
+                         for name in ('thresholds', 'min_center', 'vmin', 'pipe_speed')}
+    except (OSError, ValueError, KeyError):
+        pass
+    if table is None:
+        table = buildThresholds(difficulty, settings)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp = f'{path}.{os.getpid()}.tmp.npz'
+            np.savez_compressed(temp, params=json.dumps(params), **table)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"Error caching autopilot table: {e}")
+    TABLES[key] = Autopilot(difficulty, **table)
+    return TABLES[key]
+
+
+def survival(difficulty, envs, frames, seed=0):
+    # Plays envs games at once for 'frames' frames; a game survives if it never crashed
+    from batch import BatchWorld
+
+    pilot = load(difficulty)
+    world = BatchWorld(envs, difficulty, seeds=range(seed, seed + envs))
+    crashed = np.zeros(envs, dtype=bool)
+    first_scores = np.zeros(envs, dtype=np.int64)
+    start = time.perf_counter()
+    for _ in range(frames):
+        _, done = world.step(pilot.decideBatch(world.observe()))
+        new = done & ~crashed
+        first_scores[new] = world.last_score[new]
+        crashed |= done
+    elapsed = time.perf_counter() - start
+    first_scores[~crashed] = world.score[~crashed]
+
+    obs = world.observe()
+    decide_start = time.perf_counter()
+    for _ in range(20):
+        pilot.decideBatch(obs)
+    decisions = 20 * envs / (time.perf_counter() - decide_start)
+    return {'survival': 1 - crashed.mean(), 'mean_score': first_scores.mean(), 'frames_per_s': envs * frames / elapsed,
+            'decisions_per_s': decisions}
+
+
+def report(difficulties, envs, frames, seed):
+    from engine import World
+
+    print(f"{envs} games per difficulty, survived = no crash in {frames} frames")
+    for difficulty in difficulties:
+        result = survival(difficulty, envs, frames, seed)
+        # One World, one decision per call, as mainGame makes them
+        pilot = load(difficulty)
+        world = World(difficulty).reset(seed)
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.5:
+            for _ in range(1000):
+                pilot(world)
+            count += 1000
+        single = count / (time.perf_counter() - start)
+        print(f"{difficulty:>6}: survival {100 * result['survival']:6.2f}%  mean score {result['mean_score']:8.1f}  "
+              f"{result['frames_per_s']:,.0f} batch frames/s  {result['decisions_per_s']:,.0f} batch decisions/s  "
+              f"{single:,.0f} single decisions/s")
+
+
+def soak(difficulties, minutes, record, game_frames=SOAK_GAME_FRAMES):
+    # The real mainGame loop under the SDL dummy drivers with the autopilot at the
+    # controls: unthrottled, replays recorded, every replay re-verified at the end.
+    # The bird stops flapping after game_frames, so every game ends in a crash
+    import resource
+    import tempfile
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import main_2
+    import replay
+    from scores import ScoreStore
+
+    main_2.FPS = 0
+    main_2.REFRESH_RATE = 0
+    main_2.TIMESTEP.lockstep = True
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.RECORD_DIR = record or tempfile.mkdtemp()
+    main_2.loadAssets()
+
+    deadline = time.perf_counter() + minutes * 60
+    games = frames = 0
+    rss = []
+    while time.perf_counter() < deadline:
+        for difficulty in difficulties:
+            main_2.difficulty = difficulty
+            pilot = load(difficulty)
+            world = main_2.mainGame(lambda world: world.frame < game_frames and pilot(world))
+            games += 1
+            frames += world.frame
+        rss.append(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    main_2.SCORES.flush()
+    print(f"{games} games, {frames:,} frames in {minutes:g} min; peak RSS {rss[0]:.1f} MB after the first round, "
+          f"{rss[-1]:.1f} MB at the end")
+    return replay.verify([main_2.RECORD_DIR])
+
+
+def attractCheck(difficulty, press_frame=20, game_frames=SOAK_GAME_FRAMES):
+    # Attract demos in the real game loop, a key posted on press_frame: each
+    # of SPACE, UP (flap keys, queued by INPUT rather than handed to the
+    # scene) and another key must end the demo and leave no flap queued
+    import tempfile
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import main_2
+    from scores import ScoreStore
+
+    main_2.FPS = 0
+    main_2.REFRESH_RATE = 0
+    main_2.TIMESTEP.lockstep = True
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.loadAssets()
+    main_2.difficulty = difficulty
+    pilot = load(difficulty)
+
+    ok = True
+    for key in (pygame.K_SPACE, pygame.K_UP, pygame.K_a):
+        def policy(world):
+            if world.frame == press_frame:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+            return world.frame < game_frames and pilot(world)
+        world = main_2.mainGame(policy, attract=True)
+        ended = not world.crashed and world.frame <= press_frame + 2 and not main_2.INPUT.flaps
+        ok = ok and ended
+        print(f"{pygame.key.name(key):>5}: demo {'ended' if ended else 'NOT ended'} on frame {world.frame}"
+              f"{', crashed' if world.crashed else ''}, {len(main_2.INPUT.flaps)} flaps queued")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table-driven autopilot: survival report and soak test")
+    parser.add_argument('command', choices=['build', 'report', 'soak', 'attract'])
+    parser.add_argument('--difficulty', nargs='+', default=list(DIFFICULTY_SETTINGS))
+    parser.add_argument('--envs', type=int, default=1000, help='games per difficulty (report)')
+    parser.add_argument('--frames', type=int, default=SURVIVAL_FRAMES, help='frames per game (report)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--minutes', type=float, default=1.0, help='soak duration')
+    parser.add_argument('--record', metavar='DIR', help='keep the soak replays in DIR')
+    parser.add_argument('--game-frames', type=int, default=SOAK_GAME_FRAMES, help='frames per soak game')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        for difficulty in args.difficulty:
+            start = time.perf_counter()
+            pilot = load(difficulty)
+            print(f"{difficulty:>6}: {pilot.thresholds.shape} table ({time.perf_counter() - start:.2f}s) "
+                  f"-> {tablePath(difficulty)}")
+    elif args.command == 'report':
+        report(args.difficulty, args.envs, args.frames, args.seed)
+    elif args.command == 'attract':
+        raise SystemExit(0 if all(attractCheck(difficulty) for difficulty in args.difficulty) else 1)
+    else:
+        raise SystemExit(0 if soak(args.difficulty, args.minutes, args.record, args.game_frames) else 1)
+
+
+if __name__ == '__main__':
+    main()
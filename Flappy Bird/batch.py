@@ -0,0 +1,127 @@
+import random
+
+import numpy as np
+
+from engine import (SCREENWIDTH, SCREENHEIGHT, GROUNDY, DIFFICULTY_SETTINGS,
+                    PLAYER_WIDTH, PLAYER_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT, BASE_HEIGHT,
+                    START_VELOCITY_Y, MAX_VELOCITY_Y, GRAVITY, FLAP_VELOCITY)
+
+# N independent games stored as structure-of-arrays and advanced together.
+# Each env follows exactly the same rules as engine.World; env i seeded with
+# seeds[i] plays the same first game as World(difficulty).reset(seeds[i]).
+# Only two pipe pairs are ever alive in mainGame, so pipes are (n, 2) arrays.
+
+
+class BatchWorld:
+
+    def __init__(self, n, difficulty='Medium', seeds=None):
+        settings = DIFFICULTY_SETTINGS[difficulty]
+        self.n = n
+        self.difficulty = difficulty
+        self.pipe_gap = settings['pipe_gap']
+        self.pipe_speed = settings['pipe_speed']
+        self.pipe_spacing = SCREENWIDTH * 0.8
+        self.playerx = int(SCREENWIDTH / 5)
+
+        self.playery = np.zeros(n)
+        self.velocity = np.zeros(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.pipe_x = np.zeros((n, 2))
+        self.upper_y = np.zeros((n, 2))
+        self.lower_y = np.zeros((n, 2))
+
+        # Stats of the last finished game per env, valid where done was True
+        self.last_score = np.zeros(n, dtype=np.int64)
+        self.last_frames = np.zeros(n, dtype=np.int64)
+        self.episodes = np.zeros(n, dtype=np.int64)
+
+        # Gap centers are drawn with a per-env Python RNG so that streams
+        # stay independent and match engine.getRandomPipe draw for draw.
+        self.min_center = self.pipe_gap // 2 + 50
+        self.max_center = max(self.min_center, SCREENHEIGHT - BASE_HEIGHT - self.pipe_gap // 2 - 50)
+        self.rngs = [random.Random() for _ in range(n)]
+        self.reset(seeds)
+
+    def drawGap(self, i):
+        center_y = self.rngs[i].randint(self.min_center, self.max_center)
+        return center_y - self.pipe_gap // 2 - PIPE_HEIGHT, center_y + self.pipe_gap // 2
+
+    def reset(self, seeds=None):
+        if seeds is None:
+            seeds = [None] * self.n
+        for i, seed in enumerate(seeds):
+            self.rngs[i].seed(seed)
+        self.episodes[:] = 0
+        self.resetEnvs(np.arange(self.n))
+        return self
+
+    def resetEnvs(self, idx):
+        self.playery[idx] = int(SCREENHEIGHT / 2)
+        self.velocity[idx] = START_VELOCITY_Y
+        self.score[idx] = 0
+        self.frame[idx] = 0
+        self.pipe_x[idx, 0] = SCREENWIDTH + 200
+        self.pipe_x[idx, 1] = SCREENWIDTH + 200 + self.pipe_spacing
+        for i in idx.tolist():
+            self.upper_y[i, 0], self.lower_y[i, 0] = self.drawGap(i)
+            self.upper_y[i, 1], self.lower_y[i, 1] = self.drawGap(i)
+
+    def step(self, flap):
+        """Advance every env by one frame.
+
+        flap is a bool array of shape (n,). Returns (rewards, done): points
+        scored this frame and which envs crashed. Crashed envs are reset in
+        place; their final score and length are kept in last_score/last_frames.
+        """
+        y = self.playery
+        vel = self.velocity
+        self.frame += 1
+
+        flapped = np.asarray(flap, dtype=bool) & (y > 0)
+        vel[flapped] = FLAP_VELOCITY
+        vel += (~flapped & (vel < MAX_VELOCITY_Y)) * GRAVITY
+        y += np.minimum(vel, GROUNDY - y - PLAYER_HEIGHT)
+
+        # Collision detection
+        px = self.playerx
+        overlap_x = (px + PLAYER_WIDTH > self.pipe_x) & (px < self.pipe_x + PIPE_WIDTH)
+        yy = y[:, None]
+        outside_gap = (yy < self.upper_y + PIPE_HEIGHT) | (yy + PLAYER_HEIGHT > self.lower_y)
+        done = (overlap_x & outside_gap).any(axis=1) | (y > GROUNDY - 25)
+
+        # Move pipes (crashed envs are reset below, so moving them is harmless)
+        self.pipe_x -= self.pipe_speed
+
+        # Replace the first pipe once it leaves the screen
+        spawn = np.flatnonzero((self.pipe_x[:, 0] < -PIPE_WIDTH) & ~done)
+        if spawn.size:
+            for arr in (self.pipe_x, self.upper_y, self.lower_y):
+                arr[spawn, 0] = arr[spawn, 1]
+            self.pipe_x[spawn, 1] = self.pipe_x[spawn, 0] + self.pipe_spacing
+            for i in spawn.tolist():
+                self.upper_y[i, 1], self.lower_y[i, 1] = self.drawGap(i)
+
+        # Score
+        player_mid = px + PLAYER_WIDTH / 2
+        pipe_mid = self.pipe_x + PIPE_WIDTH / 2
+        rewards = ((pipe_mid <= player_mid) & (player_mid < pipe_mid + self.pipe_speed)).sum(axis=1)
+        rewards[done] = 0
+        self.score += rewards
+
+        finished = np.flatnonzero(done)
+        if finished.size:
+            self.last_score[finished] = self.score[finished]
+            self.last_frames[finished] = self.frame[finished]
+            self.episodes[finished] += 1
+            self.resetEnvs(finished)
+        return rewards, done
+
+    def observe(self):
+        # (n, 4): bird y, velocity, distance to and centre of the next gap
+        ahead = self.pipe_x[:, 0] + PIPE_WIDTH <= self.playerx
+        nxt = ahead.astype(np.intp)
+        rows = np.arange(self.n)
+        gap_center = (self.upper_y[rows, nxt] + PIPE_HEIGHT + self.lower_y[rows, nxt]) / 2
+        return np.stack([self.playery, self.velocity,
+                         self.pipe_x[rows, nxt] - self.playerx, gap_center], axis=1)
@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from audio import AudioManager
+from config import SOUNDS
+
+# Bursts of sound effects through audio.AudioManager.
+#
+# Each burst is --frames frames, 1/--refresh s apart, and every frame asks
+# for --plays 'point' and 'wing' sounds and one 'hit', far more than a
+# game does, to show how the manager bounds the busy moments. Runs
+# --bursts bursts under the SDL dummy audio driver with the game's sounds,
+# then prints the time per play() call and per frame, and the manager's
+# counters (the ones on the F3 overlay and in --profile exports): played,
+# deduplicated, over the voice limit, no free channel, preempted, not
+# loaded, failed loads.
+# Usage (from the repo root): python "Flappy Bird/bench_audio.py" --plays 20 --frames 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AudioManager under bursts of sounds")
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=5, help='frames per burst')
+    parser.add_argument('--plays', type=int, default=20, help="'point' and 'wing' requests per frame each")
+    parser.add_argument('--refresh', type=int, default=60, help='frames per second')
+    parser.add_argument('--channels', type=int, default=8)
+    args = parser.parse_args()
+
+    pygame.mixer.init()
+    audio = AudioManager(channels=args.channels)
+    audio.load({name: (lambda path=path: pygame.mixer.Sound(path)) for name, path in SOUNDS.items()},
+               background=False)
+    names = ['point', 'wing'] * args.plays + ['hit']
+
+    calls = frames = 0
+    busy = worst = 0.0
+    for _ in range(args.bursts):
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            for name in names:
+                audio.play(name)
+            elapsed = time.perf_counter() - start
+            busy += elapsed
+            worst = max(worst, elapsed)
+            calls += len(names)
+            frames += 1
+            time.sleep(max(0.0, 1 / args.refresh - elapsed))
+        time.sleep(0.5)  # Let the voices finish between bursts
+
+    stats = audio.stats()
+    print(f"{args.bursts} bursts of {args.frames} frames, {len(names)} plays per frame, {args.channels} channels")
+    print(f"  play() {1e6 * busy / calls:.1f} us per call, {1000 * busy / frames:.3f} ms per frame "
+          f"(max {1000 * worst:.3f} ms)")
+    print('  ' + '  '.join(f"{key} {value}" for key, value in stats.items() if key not in ('voices', 'loaded')))
+
+
+if __name__ == '__main__':
+    main()
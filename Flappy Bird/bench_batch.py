@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import numpy as np
+
+from engine import World, PIPE_WIDTH, PLAYER_HEIGHT
+from batch import BatchWorld
+
+# Env-steps/sec of BatchWorld as a function of batch size, next to the
+# one-game-per-loop engine.World baseline.
+# Usage (from the repo root): python "Flappy Bird/bench_batch.py"
+
+
+def batchPolicy(world):
+    # Flap when the bird sinks below the bottom of the next gap
+    first = world.pipe_x[:, 0] + PIPE_WIDTH > world.playerx
+    lower_y = np.where(first, world.lower_y[:, 0], world.lower_y[:, 1])
+    return (world.playery + PLAYER_HEIGHT > lower_y) & (world.velocity >= 0)
+
+
+def worldPolicy(world):
+    for x, gap_top, gap_bottom in world.pipes:
+        if x + PIPE_WIDTH > world.playerx:
+            return world.playery + PLAYER_HEIGHT > gap_bottom and world.bird_velocity_y >= 0
+    return False
+
+
+def benchWorld(difficulty, steps):
+    world = World(difficulty).reset(0)
+    seed = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        world.step(worldPolicy(world))
+        if world.crashed:
+            seed += 1
+            world.reset(seed)
+    return steps / (time.perf_counter() - start)
+
+
+def benchBatch(n, difficulty, frames):
+    world = BatchWorld(n, difficulty, seeds=range(n))
+    start = time.perf_counter()
+    for _ in range(frames):
+        world.step(batchPolicy(world))
+    elapsed = time.perf_counter() - start
+    return n * frames / elapsed, world.episodes.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BatchWorld throughput")
+    parser.add_argument('--difficulty', default='Medium')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 16, 256, 1024, 4096, 16384])
+    args = parser.parse_args()
+
+    base = benchWorld(args.difficulty, args.frames * 20)
+    print(f"{'engine.World':>14}: {base:14,.0f} env-steps/s")
+    for n in args.sizes:
+        rate, episodes = benchBatch(n, args.difficulty, args.frames)
+        print(f"{'batch n=' + str(n):>14}: {rate:14,.0f} env-steps/s  x{rate / base:7.1f}  ({episodes} games)")
+
+
+if __name__ == '__main__':
+    main()
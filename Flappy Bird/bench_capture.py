@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Cost of recording gameplay with capture.FrameCapture.
+#
+# Plays the real mainGame() under the SDL dummy drivers with the autopilot
+# at the controls for --seconds, first without capture and then with it,
+# at --refresh rendered frames per second (0: as fast as possible, which
+# shows where the worker falls behind and starts dropping). Reports frame
+# time percentiles for both runs, the per-frame grab cost on the game
+# thread, the worker's time per frame, dropped frames and the stream size.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_capture.py" --seconds 10 --refresh 60
+
+
+def play(main_2, pilot, seconds, game_frames):
+    from profiler import FrameProfiler, summarize
+
+    profiler = main_2.PROFILER = main_2.SCENES.profiler = FrameProfiler(trace_limit=None)
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        world = main_2.mainGame(lambda world: world.frame < game_frames and pilot(world))
+        frames += world.frame
+    elapsed = time.perf_counter() - start
+    trace = [phases for scene, _, phases in profiler.trace if scene == 'game']
+    busy = summarize([phases['frame'] - phases.get('wait', 0.0) for phases in trace])
+    capture = summarize([phases.get('capture', 0.0) for phases in trace])
+    return {'fps': len(trace) / elapsed, 'busy': busy, 'capture': capture}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the frame cost of gameplay capture")
+    parser.add_argument('--seconds', type=float, default=10.0, help='play time per run')
+    parser.add_argument('--refresh', type=int, default=60, help='rendered frames per second (0: unthrottled)')
+    parser.add_argument('--difficulty', default='Medium')
+    parser.add_argument('--game-frames', type=int, default=600, help='physics steps before the bird lets go')
+    parser.add_argument('--level', type=int, default=None, help='zlib level of the stream')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autopilot
+    import capture
+    import main_2
+    from scores import ScoreStore
+
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.REFRESH_RATE = args.refresh
+    main_2.TIMESTEP.lockstep = args.refresh == 0
+    main_2.difficulty = args.difficulty
+    main_2.loadAssets()
+    pilot = autopilot.load(args.difficulty)
+
+    directory = tempfile.mkdtemp()
+    results = {}
+    for name in ('off', 'on'):
+        main_2.CAPTURE = None
+        if name == 'on':
+            level = capture.COMPRESS_LEVEL if args.level is None else args.level
+            main_2.CAPTURE = capture.FrameCapture(directory, level=level)
+        results[name] = play(main_2, pilot, args.seconds, args.game_frames)
+        if main_2.CAPTURE:
+            main_2.CAPTURE.close()
+
+    print(f"{args.difficulty}, refresh {args.refresh or 'unthrottled'}, {args.seconds:g}s per run")
+    for name, result in results.items():
+        busy = result['busy']
+        print(f"  capture {name:<3}  {result['fps']:8.1f} fps  frame work p50 {1000 * busy['p50']:.3f} ms  "
+              f"p95 {1000 * busy['p95']:.3f} ms  p99 {1000 * busy['p99']:.3f} ms")
+    stats = main_2.CAPTURE.stats()
+    grab = results['on']['capture']
+    size = sum(entry.stat().st_size for entry in os.scandir(directory))
+    print(f"  grab (game thread) p50 {1000 * grab['p50']:.3f} ms  p95 {1000 * grab['p95']:.3f} ms  "
+          f"max {1000 * grab['max']:.3f} ms")
+    print(f"  worker {stats['encode_mean_ms']:.2f} ms/frame (p95 {stats['encode_p95_ms']:.2f})  "
+          f"{stats['dropped']}/{stats['frames']} frames dropped ({100 * stats['drop_rate']:.1f}%)  "
+          f"{stats['bytes_per_frame'] / 1024:.1f} KB/frame ({stats['ratio']:.0f}x), {size / 1024 / 1024:.1f} MB written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import os
+import random
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from collision import MaskCollider
+from config import PLAYER, PIPE
+from engine import World
+from pipestore import PipeStore
+
+# Collision cost per frame as pipe count and pipe speed grow, for the old
+# test-every-pipe box loop, the broadphase box loop in engine.World and
+# collision.MaskCollider with and without the swept test. Also counts
+# pipes a fast bird steps over between frames, and box hits that touch
+# only transparent pixels.
+# Usage (from the repo root): python "Flappy Bird/bench_collision.py"
+
+
+def everyPipe(world, prev_playery):
+    # The original loop: box test against every pipe pair
+    playerx, playery = world.playerx, world.playery
+    pipes = world.pipes
+    hit = False
+    for i in pipes.order:
+        x = pipes.x[i]
+        if playerx + world.player_width > x and playerx < x + world.pipe_width:
+            if playery < pipes.gap_top[i] or playery + world.player_height > pipes.gap_bottom[i]:
+                hit = True
+    return hit
+
+
+def boxBroadphase(world, prev_playery):
+    # The loop in engine.World.step: stop at the first pipe right of the bird
+    playerx, playery = world.playerx, world.playery
+    pipes = world.pipes
+    xs, tops, bottoms = pipes.x, pipes.gap_top, pipes.gap_bottom
+    right = playerx + world.player_width
+    for i in pipes.order:
+        if xs[i] >= right:
+            break
+        if playerx < xs[i] + world.pipe_width:
+            if playery < tops[i] or playery + world.player_height > bottoms[i]:
+                return True
+    return False
+
+
+def corridor(count, speed, gap_bottom, spacing=60):
+    # count pipe columns from just left of the bird to off screen; the bird
+    # sits in the gap, or reaches into the lower pipe's lip (gap_bottom 210)
+    # without touching it so every test goes through to the narrowphase
+    world = World('Medium', settings={'pipe_gap': 100, 'pipe_speed': speed})
+    world.pipes = PipeStore(capacity=count)
+    for i in range(count):
+        world.pipes.push(-world.pipe_width + 1 + i * spacing, -1000, gap_bottom)
+    world.playery = 200
+    world.frame = 2
+    return world
+
+
+def perTest(test, world, number):
+    world.playery = 200
+    return min(timeit.repeat(lambda: test(world, 196), number=number, repeat=5)) / number * 1e9
+
+
+def tunnelling(collider, speed, y):
+    # One pipe sweeping past a still bird sitting inside the upper pipe:
+    # fraction of starting phases where the pipe is never seen
+    missed = 0
+    for phase in range(speed):
+        world = World('Medium', settings={'pipe_gap': 100, 'pipe_speed': speed}, collider=collider)
+        world.pipes = PipeStore()
+        world.pipes.push(world.playerx + world.player_width + phase, y + 50, y + 400)
+        world.playery = y
+        seen = False
+        for frame in range(1, 400 // speed + 3):
+            world.frame = frame
+            seen = seen or collider.collide(world, y)
+            world.pipes.move(speed)
+        missed += not seen
+    return missed / speed
+
+
+def cornerHits(collider, samples, seed):
+    # Random bird positions whose box touches a lower pipe's box
+    rng = random.Random(seed)
+    world = World('Medium', collider=collider)
+    world.frame = 1
+    box = mask = 0
+    while box < samples:
+        world.pipes = PipeStore()
+        x = world.playerx + rng.uniform(-world.pipe_width, world.player_width)
+        world.pipes.push(x, -1000, 300)
+        world.playery = rng.randint(300 - world.player_height, 300)
+        if world.playery + world.player_height > 300:
+            box += 1
+            mask += collider.collide(world, world.playery)
+    return box, mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark two-phase collision")
+    parser.add_argument('--counts', type=int, nargs='+', default=[2, 8, 32, 128])
+    parser.add_argument('--speeds', type=int, nargs='+', default=[4, 16, 64, 128])
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pygame.display.set_mode((1, 1))
+    bird = pygame.image.load(PLAYER).convert_alpha()
+    pipe = pygame.image.load(PIPE).convert_alpha()
+    discrete = MaskCollider(swept=False)
+    swept = MaskCollider(swept=True)
+    for collider in (discrete, swept):
+        collider.setSprites(bird, pygame.transform.rotate(pipe, 180), pipe)
+
+    tests = [('every pipe', everyPipe), ('broadphase', boxBroadphase),
+             ('mask', discrete.collide), ('mask+swept', swept.collide)]
+    for name, gap_bottom in (('in the gap', 1000), ('at a pipe edge', 210)):
+        print(f"{'ns/test, ' + name:>24}" + ''.join(f"{test:>12}" for test, _ in tests))
+        for count in args.counts:
+            for speed in args.speeds:
+                row = [perTest(test, corridor(count, speed, gap_bottom), args.number) for _, test in tests]
+                print(f"{count:11} pipes {speed:3} px" + ''.join(f"{ns:12.0f}" for ns in row))
+
+    print("pipes stepped over (bird inside the upper pipe):")
+    for speed in args.speeds:
+        print(f"  {speed:3} px/frame: discrete {tunnelling(discrete, speed, 100):6.1%}"
+              f"  swept {tunnelling(swept, speed, 100):6.1%}")
+
+    box, mask = cornerHits(discrete, 10000, args.seed)
+    print(f"box hits on transparent pixels only: {box - mask} of {box} ({(box - mask) / box:.1%})")
+
+
+if __name__ == '__main__':
+    main()
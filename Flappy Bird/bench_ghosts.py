@@ -0,0 +1,119 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+# Frame rate of a ghost race.
+#
+# Builds ghost tracks of bot runs (ghosts.generate) and plays the real
+# mainGame() on each under the SDL dummy drivers, the autopilot racing,
+# at --refresh frames per second (0: as fast as possible). Reports the
+# frame rate, frame work percentiles (everything but the wait), the time
+# spent drawing ghosts and how many were on screen. Then times drawing the
+# ghosts of one frame three ways: one blit() per ghost, one blits() call
+# of the same sprite, and the game's blits() of stacked sprites.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_ghosts.py" --ghosts 0 500 1000 --seconds 10
+
+
+def race(main_2, pilot, track, seconds, game_frames):
+    from profiler import FrameProfiler, summarize
+
+    counts = []
+    draw = main_2.drawGhosts
+
+    def drawGhosts(track, world, alpha):
+        counts.append(int(track.alive[world.frame]) if world.frame < len(track.alive) else 0)
+        draw(track, world, alpha)
+    main_2.drawGhosts = drawGhosts
+
+    profiler = main_2.PROFILER = main_2.SCENES.profiler = FrameProfiler(trace_limit=None)
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        shutil.copy(track, main_2.RACE_FILE)  # Each game joins the track; start every game from the same one
+        main_2.mainGame(lambda world: world.frame < game_frames and pilot(world))
+    elapsed = time.perf_counter() - start
+    main_2.drawGhosts = draw
+
+    trace = [phases for scene, _, phases in profiler.trace if scene == 'game']
+    return {'fps': len(trace) / elapsed,
+            'busy': summarize([phases['frame'] - phases.get('wait', 0.0) for phases in trace]),
+            'ghosts': summarize([phases.get('ghosts', 0.0) for phases in trace]),
+            'on_screen': (min(counts), sorted(counts)[len(counts) // 2]) if counts else (0, 0)}
+
+
+def drawCosts(main_2, path, frame):
+    # Microseconds to draw one frame's ghosts: per-ghost blit, one blits, stacked blits
+    from itertools import repeat
+    import ghosts
+
+    track = ghosts.GhostTrack.load(path)
+    sprites = main_2.GAME_SPRITES['ghosts']
+    screen = main_2.SCREEN
+    x = main_2.SCREENWIDTH // 5
+    ys = track.positions(frame, 0.5)
+
+    def loop():
+        for y in ys.tolist():
+            screen.blit(sprites[0], (x, y))
+
+    def blits():
+        screen.blits(zip(repeat(sprites[0]), zip(repeat(x), ys.tolist())), doreturn=False)
+
+    def stacked():
+        screen.blits(ghosts.blitSequence(sprites, x, ys), doreturn=False)
+    costs = {name: min(timeit.repeat(fn, number=100, repeat=5)) / 100 * 1e6
+             for name, fn in (('blit per ghost', loop), ('one blits', blits), ('stacked blits', stacked))}
+    return len(ys), len(set(ys.tolist())), costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the frame rate of ghost races")
+    parser.add_argument('--ghosts', type=int, nargs='+', default=[0, 500, 1000], help='ghosts per track')
+    parser.add_argument('--seconds', type=float, default=10.0, help='race time per track')
+    parser.add_argument('--refresh', type=int, default=60, help='rendered frames per second (0: unthrottled)')
+    parser.add_argument('--difficulty', default='Easy')
+    parser.add_argument('--seed', type=int, default=7, help='pipe seed of the tracks')
+    parser.add_argument('--game-frames', type=int, default=600, help='physics steps before the bird lets go')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autopilot
+    import ghosts
+    import main_2
+    from scores import ScoreStore
+
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.REFRESH_RATE = args.refresh
+    main_2.TIMESTEP.lockstep = args.refresh == 0
+    main_2.loadAssets()
+    pilot = autopilot.load(args.difficulty)
+    directory = tempfile.mkdtemp()
+    main_2.RACE_FILE = os.path.join(directory, 'race' + ghosts.EXTENSION)
+
+    print(f"{args.difficulty}, seed {args.seed}, refresh {args.refresh or 'unthrottled'}, {args.seconds:g}s per track")
+    largest = None
+    for count in args.ghosts:
+        track = os.path.join(directory, f'{count}{ghosts.EXTENSION}')
+        ghosts.generate(track, count, args.difficulty, args.seed, args.game_frames + 1)
+        result = race(main_2, pilot, track, args.seconds, args.game_frames)
+        busy, drawn = result['busy'], result['ghosts']
+        least, median = result['on_screen']
+        print(f"  {count:5d} ghosts  {result['fps']:8.1f} fps  frame work p50 {1000 * busy['p50']:.3f} ms  "
+              f"p99 {1000 * busy['p99']:.3f} ms  ghosts p50 {1000 * drawn['p50']:.3f} ms  "
+              f"p99 {1000 * drawn['p99']:.3f} ms  on screen: median {median}, min {least}")
+        if count:
+            largest = track
+    if largest is not None:
+        flying, distinct, costs = drawCosts(main_2, largest, args.game_frames // 2)
+        print(f"  one frame, {flying} ghosts at {distinct} distinct ys: " +
+              ', '.join(f"{name} {us:.0f} us" for name, us in costs.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# CPU used by the menus while nobody touches them.
+#
+# Runs chooseDifficulty() and welcomeScreen() under the SDL dummy drivers
+# with attract mode off, leaves each one idle for --seconds and then sends
+# the key that exits it from a pygame timer. Reports the process CPU time
+# (user + system) as a share of one core, and how often the scene woke up
+# and how many frames it pushed to the display. The first line is the
+# floor: the same process doing nothing but time.sleep() (SDL's audio
+# thread and the like).
+#
+# --loop old runs the menus the way they ran before the scene manager:
+# drawn, presented and paced by Clock.tick(FPS) on every frame (SCENES
+# block off, redraw on). --loop new is the sleeping scenes; both (the
+# default) gives the before and after figures in one run.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_idle.py" --seconds 10
+#   python "Flappy Bird/bench_idle.py" --loop old
+
+
+def cpuTime():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def idle(main_2, scene, run, key, seconds):
+    import pygame
+    from pygame.locals import KEYDOWN
+
+    pygame.event.clear()
+    pygame.time.set_timer(pygame.event.Event(KEYDOWN, key=key), int(seconds * 1000), 1)
+    presented = main_2.RENDERER.frames
+    wakeups = sum(1 for trace in main_2.PROFILER.trace if trace[0] == scene)
+    cpu, wall = cpuTime(), time.perf_counter()
+    run()
+    cpu, wall = cpuTime() - cpu, time.perf_counter() - wall
+    return {'cpu_percent': 100 * cpu / wall, 'cpu_ms_per_s': 1000 * cpu / wall, 'seconds': wall,
+            'wakeups': sum(1 for trace in main_2.PROFILER.trace if trace[0] == scene) - wakeups,
+            'presented': main_2.RENDERER.frames - presented}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure idle CPU of the menu screens")
+    parser.add_argument('--seconds', type=float, default=10.0, help='idle time per screen')
+    parser.add_argument('--loop', choices=['old', 'new', 'both'], default='both',
+                        help='old: redraw at FPS every frame, as before the scene manager; new: sleeping scenes')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import pygame
+    import main_2
+    from scores import ScoreStore
+
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.ATTRACT_DELAY = 0
+    main_2.loadAssets()
+
+    cpu, wall = cpuTime(), time.perf_counter()
+    time.sleep(args.seconds)
+    cpu, wall = cpuTime() - cpu, time.perf_counter() - wall
+    print(f"{'floor':<14} {100 * cpu / wall:6.2f}% CPU ({1000 * cpu / wall:.1f} ms/s) over {wall:.1f}s")
+    for loop in (['old', 'new'] if args.loop == 'both' else [args.loop]):
+        main_2.SCENES.block = loop == 'new'
+        main_2.SCENES.redraw = loop == 'old'
+        for scene, run, key in (('difficulty', main_2.chooseDifficulty, pygame.K_RETURN),
+                                ('welcome', main_2.welcomeScreen, pygame.K_SPACE)):
+            result = idle(main_2, scene, run, key, args.seconds)
+            print(f"{scene + ' ' + loop:<14} {result['cpu_percent']:6.2f}% CPU ({result['cpu_ms_per_s']:.1f} ms/s) "
+                  f"over {result['seconds']:.1f}s, {result['wakeups']} wakeups, "
+                  f"{result['presented']} frames presented")
+
+
+if __name__ == '__main__':
+    main()
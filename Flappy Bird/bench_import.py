@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Import time and time to first frame, checked against budgets.
+#
+# Every module in HEADLESS (config, simulation, persistence) is imported
+# in a fresh process under python -X importtime, and must come in under
+# its budget in HEADLESS without importing pygame, starting a thread or
+# creating a file. main_2 is imported the same way and must not start pygame, open
+# a window or start the mixer (pygame itself is imported, it is the game).
+# Then the real entry point, "python main_2.py", runs under the SDL dummy
+# drivers until it presents its first frame, which must happen within
+# --first-frame-budget of the process being spawned.
+#
+# Each figure is the median of --runs processes, after one run that warms
+# the disk cache and writes the bytecode caches. Exits with status 1 when
+# a budget is exceeded or a module has a side effect, so CI can run it;
+# --json writes the results to a file as well.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_import.py"
+#   python "Flappy Bird/bench_import.py" --runs 10 --json startup.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Import budgets in ms, including the standard library modules each pulls
+# in. A few ms for the settings and the simulation; engine needs random
+# (about 4 ms of its 5) and replay needs engine. scores has the rest: json
+# to read the boards and threading for the writer come to about 20 ms.
+# numpy or pygame in any of them costs over 100 ms.
+HEADLESS = {'config': 2.0, 'pipestore': 2.0, 'timestep': 2.0, 'engine': 8.0, 'replay': 10.0, 'scores': 30.0}
+FIRST_FRAME_BUDGET_MS = 1000.0  # python main_2.py to its first presented frame
+
+# Runs in the child: import the module, then report what importing it did
+CHECK = """
+import os
+before = sorted(os.listdir('.'))
+import {module}
+import json, sys, threading
+pygame = sys.modules.get('pygame')
+print(json.dumps({{
+    'pygame': pygame is not None,
+    'initialized': bool(pygame and pygame.get_init()),
+    'window': bool(pygame and pygame.display.get_init() and pygame.display.get_surface() is not None),
+    'mixer': bool(pygame and pygame.mixer.get_init()),
+    'threads': threading.active_count() - 1,
+    'files': sorted(os.listdir('.')) != before,
+}}))
+"""
+
+
+def childEnv():
+    env = dict(os.environ, PYTHONPATH=HERE + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    env.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    return env
+
+
+def importOnce(module):
+    # (milliseconds, side effects) of importing module in a fresh process
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHECK.format(module=module)],
+                         capture_output=True, text=True, env=childEnv())
+    if out.returncode:
+        sys.exit(f'importing {module} failed:\n{out.stderr}')
+    cumulative = None
+    for line in out.stderr.splitlines():
+        parts = line.split('|')
+        if line.startswith('import time:') and len(parts) == 3 and parts[2] == ' ' + module:
+            cumulative = int(parts[1])
+    return cumulative / 1000, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def firstFrameChild():
+    # Runs main_2.py as the game does and reports when its first frame goes out
+    import runpy
+
+    start = time.time()
+    import pygame
+    marks = {'start': start, 'pygame': time.time()}
+    set_mode, update = pygame.display.set_mode, pygame.display.update
+
+    def hookedSetMode(*args, **kwargs):
+        marks['window'] = time.time()
+        return set_mode(*args, **kwargs)
+
+    def hookedUpdate(*args):
+        update(*args)
+        marks['frame'] = time.time()
+        print(json.dumps(marks), flush=True)
+        os._exit(0)
+    pygame.display.set_mode = hookedSetMode
+    pygame.display.update = hookedUpdate
+    path = os.path.join(HERE, 'main_2.py')
+    sys.argv = [path, '--attract', '0']
+    runpy.run_path(path, run_name='__main__')
+    sys.exit('main_2.py exited without presenting a frame')
+
+
+def firstFrameOnce():
+    spawned = time.time()
+    out = subprocess.run([sys.executable, __file__, '--child-first-frame'], capture_output=True, text=True,
+                         env=childEnv(), timeout=60)
+    if out.returncode:
+        sys.exit(f'main_2.py did not reach its first frame:\n{out.stderr}')
+    marks = json.loads(out.stdout.strip().splitlines()[-1])
+    return {'interpreter': marks['start'] - spawned, 'pygame_import': marks['pygame'] - marks['start'],
+            'game_import': marks['window'] - marks['pygame'], 'boot': marks['frame'] - marks['window'],
+            'first_frame': marks['frame'] - spawned}
+
+
+def sideEffects(module, effects):
+    # What importing module did that it should not have
+    found = []
+    if module in HEADLESS and effects['pygame']:
+        found.append('imported pygame')
+    for name, what in (('initialized', 'started pygame'), ('window', 'opened a window'),
+                       ('mixer', 'started the mixer'), ('files', 'created files')):
+        if effects[name]:
+            found.append(what)
+    if effects['threads']:
+        found.append(f"started {effects['threads']} thread(s)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time and time to first frame against budgets")
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per measurement')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiply the import budgets, for slower machines')
+    parser.add_argument('--first-frame-budget', type=float, default=FIRST_FRAME_BUDGET_MS, help='ms')
+    parser.add_argument('--json', metavar='FILE', help='also write the results here')
+    parser.add_argument('--child-first-frame', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child_first_frame:
+        firstFrameChild()
+        return
+
+    failures = []
+    results = {'imports': {}, 'first_frame': None}
+    if sys.dont_write_bytecode:
+        print("PYTHONDONTWRITEBYTECODE is set: every import compiles from source")
+    print(f"import time, median of {args.runs} fresh processes")
+    for module in list(HEADLESS) + ['main_2']:
+        importOnce(module)
+        runs = [importOnce(module) for _ in range(args.runs)]
+        ms = statistics.median(run[0] for run in runs)
+        problems = sorted({problem for _, effects in runs for problem in sideEffects(module, effects)})
+        budget = HEADLESS[module] * args.budget_scale if module in HEADLESS else None
+        over = budget is not None and ms > budget
+        results['imports'][module] = {'ms': ms, 'budget_ms': budget, 'side_effects': problems}
+        if over:
+            failures.append(f'{module}: {ms:.1f} ms import')
+        failures.extend(f'{module}: {problem}' for problem in problems)
+        status = 'SLOW' if over else 'FAIL' if problems else 'ok'
+        print(f"  {module:<10} {ms:8.2f} ms  " + (f"(budget {budget:g})  " if budget else '') + status
+              + (f"  ({', '.join(problems)})" if problems else ''))
+
+    firstFrameOnce()
+    runs = [firstFrameOnce() for _ in range(args.runs)]
+    frame = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+    results['first_frame'] = frame
+    over = frame['first_frame'] > args.first_frame_budget
+    if over:
+        failures.append(f"first frame after {frame['first_frame']:.0f} ms")
+    print(f"time to first frame (python main_2.py, budget {args.first_frame_budget:g} ms): "
+          f"{frame['first_frame']:.0f} ms  {'SLOW' if over else 'ok'}")
+    print(f"  interpreter {frame['interpreter']:.0f} ms, import pygame {frame['pygame_import']:.0f} ms, "
+          f"import game + open window {frame['game_import']:.0f} ms, assets + first frame {frame['boot']:.0f} ms")
+
+    if args.json:
+        results['failures'] = failures
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if failures:
+        print('FAILED: ' + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
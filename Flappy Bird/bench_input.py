@@ -0,0 +1,92 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import main_2
+from engine import World
+from scores import ScoreStore
+
+# Flap latency histograms: key press to velocity change, measured in the
+# real mainGame() loop. A background thread posts SPACE presses at random
+# times, stamped with perf_counter() when posted (real key events have no
+# timestamp, so the game itself records no latency).
+# Usage (from the repo root): python "Flappy Bird/bench_input.py" --seconds 20
+
+MODES = [
+    ('once per frame, 32 Hz', 32, False),
+    ('once per frame, 60 Hz', 60, False),
+    ('sub-frame, 60 Hz', 60, True),
+    ('sub-frame, 144 Hz', 144, True),
+]
+
+
+class SoakWorld(World):
+    # Keeps playing after a crash until 'steps' physics steps have run
+    steps = 160
+
+    def step(self, flap=False):
+        events = super().step(flap)
+        if self.frame >= self.steps:
+            self.crashed = True
+        elif self.crashed:
+            frame = self.frame
+            self.reset()
+            self.frame = frame
+            events = [event for event in events if event not in ('hit', 'die')]
+        return events
+
+
+def presser(stop, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        time.sleep(rng.uniform(0.05, 0.25))
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE,
+                                             timestamp=time.perf_counter()))
+
+
+def run(refresh, subframe, seconds, seed):
+    main_2.REFRESH_RATE = refresh
+    main_2.INPUT.subframe = subframe
+    main_2.INPUT.measure = True
+    main_2.INPUT.latency.reset()
+
+    def newWorld():
+        world = SoakWorld(main_2.difficulty)
+        world.steps = int(seconds * main_2.FPS)
+        return world.reset(seed)
+    main_2.newWorld = newWorld
+
+    stop = threading.Event()
+    thread = threading.Thread(target=presser, args=(stop, seed), daemon=True)
+    thread.start()
+    main_2.mainGame()
+    stop.set()
+    thread.join()
+    return main_2.INPUT.latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure key press to flap latency")
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.loadAssets()
+    for name, refresh, subframe in MODES:
+        latency = run(refresh, subframe, args.seconds, args.seed)
+        print(f"== {name}")
+        for line in latency.report():
+            print('  ' + line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import random
+import timeit
+
+from engine import World, PIPE_WIDTH, PIPE_HEIGHT, SCREENWIDTH
+from pipestore import PipeStore
+
+# Per-frame pipe work on the old parallel lists of dicts vs PipeStore:
+# move, cull + spawn, the collision scan and a full draw iteration, plus
+# engine.World.step throughput on top of it.
+# Usage (from the repo root): python "Flappy Bird/bench_pipes.py"
+
+SPACING = SCREENWIDTH * 0.8
+SPEED = 4
+PLAYERX = int(SCREENWIDTH / 5)
+
+
+def dictPipes():
+    upper = [{'x': SCREENWIDTH + 200 + i * SPACING, 'y': -200} for i in range(2)]
+    lower = [{'x': SCREENWIDTH + 200 + i * SPACING, 'y': 250} for i in range(2)]
+    return upper, lower
+
+
+def dictFrame(upper, lower, playery):
+    hit = False
+    for uPipe, lPipe in zip(upper, lower):
+        if PLAYERX + 34 > uPipe['x'] and PLAYERX < uPipe['x'] + PIPE_WIDTH:
+            hit = hit or playery < uPipe['y'] + PIPE_HEIGHT or playery + 24 > lPipe['y']
+    for uPipe, lPipe in zip(upper, lower):
+        uPipe['x'] -= SPEED
+        lPipe['x'] -= SPEED
+    if upper[0]['x'] < -PIPE_WIDTH:
+        upper.pop(0)
+        lower.pop(0)
+        upper.append({'x': upper[-1]['x'] + SPACING, 'y': -200})
+        lower.append({'x': lower[-1]['x'] + SPACING, 'y': 250})
+    for uPipe, lPipe in zip(upper, lower):
+        uPipe['x'], uPipe['y'], lPipe['x'], lPipe['y']
+    return hit
+
+
+def storePipes():
+    pipes = PipeStore()
+    for i in range(2):
+        pipes.push(SCREENWIDTH + 200 + i * SPACING, 120, 250)
+    return pipes
+
+
+def storeFrame(pipes, playery):
+    hit = False
+    xs, tops, bottoms = pipes.x, pipes.gap_top, pipes.gap_bottom
+    for i in pipes.order:
+        if PLAYERX + 34 > xs[i] and PLAYERX < xs[i] + PIPE_WIDTH:
+            hit = hit or playery < tops[i] or playery + 24 > bottoms[i]
+    pipes.move(SPEED)
+    if pipes.cull(-PIPE_WIDTH):
+        pipes.push(xs[pipes.last()] + SPACING, 120, 250)
+    for x, gap_top, gap_bottom in pipes:
+        pass
+    return hit
+
+
+def perFrame(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=7)) / number * 1e9
+
+
+def benchWorld(difficulty, steps):
+    world = World(difficulty).reset(0)
+    rng = random.Random(0)
+
+    def run():
+        for _ in range(steps):
+            world.step(rng.random() < 0.08)
+            if world.crashed:
+                world.reset()
+    return steps / min(timeit.repeat(run, number=1, repeat=3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipe storage")
+    parser.add_argument('--number', type=int, default=200000)
+    parser.add_argument('--steps', type=int, default=200000)
+    args = parser.parse_args()
+
+    upper, lower = dictPipes()
+    pipes = storePipes()
+    old = perFrame(lambda: dictFrame(upper, lower, 200), args.number)
+    new = perFrame(lambda: storeFrame(pipes, 200), args.number)
+    print(f"{'dict lists':>12}: {old:8.1f} ns/frame")
+    print(f"{'PipeStore':>12}: {new:8.1f} ns/frame  x{old / new:5.2f}")
+    for difficulty in ['Easy', 'Medium', 'Hard']:
+        print(f"World.step {difficulty:>6}: {benchWorld(difficulty, args.steps):12,.0f} steps/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import main_2
+from engine import World
+from scores import ScoreStore
+
+# Frame-time comparison of dirty-rectangle vs full-window rendering, running
+# the real mainGame() with an unthrottled clock and a scripted player.
+# With --verify the frames of both modes are hashed and compared. Text cache
+# misses equal the number of FONT.render calls and score compositions.
+# Usage (from the repo root): python "Flappy Bird/bench_render.py" [--verify]
+
+
+class ScriptedWorld(World):
+    frames = 1000
+
+    def step(self, flap=False):
+        x, gap_top, gap_bottom = self.nextPipe()
+        flap = self.playery + self.player_height > gap_bottom - 10 and self.bird_velocity_y >= 0
+        events = super().step(flap)
+        if self.frame >= self.frames and not self.crashed:
+            self.crashed = True
+            events.append('die')
+        return events
+
+
+def run(dirty, frames, seed, verify):
+    main_2.RENDERER.enabled = dirty
+    main_2.RENDERER.resetStats()
+    main_2.TEXT_CACHE.resetStats()
+    hashes = []
+    if verify:
+        present = main_2.RENDERER.present
+
+        def hashed_present():
+            present()
+            hashes.append(hashlib.md5(main_2.pygame.image.tobytes(main_2.SCREEN, 'RGB')).hexdigest())
+        main_2.RENDERER.present = hashed_present
+
+    def newWorld():
+        world = ScriptedWorld(main_2.difficulty,
+                              player_size=main_2.GAME_SPRITES['player'].get_size(),
+                              pipe_size=main_2.GAME_SPRITES['pipe'][0].get_size(),
+                              base_height=main_2.GAME_SPRITES['base'].get_height())
+        world.frames = frames
+        return world.reset(seed)
+    main_2.newWorld = newWorld
+    main_2.mainGame()
+
+    if verify:
+        del main_2.RENDERER.present
+    stats = main_2.RENDERER.stats()
+    stats.update(main_2.TEXT_CACHE.stats())
+    return stats, hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dirty-rect and full-window rendering")
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verify', action='store_true', help='check both modes draw identical frames')
+    args = parser.parse_args()
+
+    main_2.REFRESH_RATE = 0  # Clock.tick(0) never sleeps
+    main_2.TIMESTEP.lockstep = True  # One physics step per rendered frame
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.loadAssets()
+
+    results = {}
+    for name, dirty in (('full', False), ('dirty', True)):
+        for difficulty in main_2.DIFFICULTY_SETTINGS:
+            main_2.difficulty = difficulty
+            stats, hashes = run(dirty, args.frames, args.seed, args.verify)
+            results[name, difficulty] = hashes
+            print(f"{name:>5} {difficulty:<7} {stats['frames']:>6} frames  {stats['ms_per_frame']:7.3f} ms/frame"
+                  f"  {stats['pixels_per_frame']:9,.0f} px/frame pushed"
+                  f"  text cache {stats['hits']} hits / {stats['misses']} misses")
+
+    if args.verify:
+        for difficulty in main_2.DIFFICULTY_SETTINGS:
+            same = results['full', difficulty] == results['dirty', difficulty]
+            print(f"verify {difficulty}: {'identical frames' if same else 'FRAMES DIFFER'}")
+            if not same:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Startup cost of the per-file asset loader vs the prebuilt cache
+# (python "Flappy Bird/assets.py" build).
+#   cold: a fresh process per run, timing loadAssets and the whole start
+#   warm: the same loader run again inside one process
+# Usage (from the repo root): python "Flappy Bird/bench_startup.py"
+
+LOADERS = ['files', 'cache']
+
+
+def child(loader, repeats):
+    start = time.perf_counter()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import main_2
+    import assets
+    main_2.init()  # The window, as the game opens it before loading
+    imported = time.perf_counter()
+    load = main_2.loadAssetFiles if loader == 'files' else main_2.loadAssets
+    if loader == 'cache' and assets.loadCache() is None:
+        sys.exit('asset cache missing or stale: run python "Flappy Bird/assets.py" build')
+
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - t)
+    print(json.dumps({'import': imported - start, 'loads': times}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare asset loading from files and from the cache")
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes per loader')
+    parser.add_argument('--warm', type=int, default=20, help='repeated loads per process')
+    parser.add_argument('--child', choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.warm)
+        return
+
+    for loader in LOADERS:
+        cold, warm, total = [], [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, __file__, '--child', loader, '--warm', str(args.warm)],
+                                 capture_output=True, text=True, check=True).stdout
+            total.append(time.perf_counter() - start)
+            result = json.loads(out.strip().splitlines()[-1])
+            cold.append(result['loads'][0])
+            warm.extend(result['loads'][1:])
+        print(f"{loader:>6}: cold load {1000 * statistics.median(cold):7.2f} ms  "
+              f"warm load {1000 * statistics.median(warm):7.2f} ms  "
+              f"whole process {1000 * statistics.median(total):7.1f} ms  (median of {args.runs})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+# Regression benchmark suite.
+#
+# Each difficulty runs in a fresh process under the SDL dummy drivers with
+# an unthrottled clock: chooseDifficulty() and welcomeScreen() with scripted
+# key presses, then mainGame() with a scripted player that presses SPACE
+# through the normal input queue. The menus are drawn on every frame
+# (SCENES.redraw), as they were before the scene manager: left to
+# themselves they would draw once and then time empty frames. Every loop is timed per phase by
+# main_2.PROFILER. Reported per loop: frames/sec, phase times, gc objects
+# per frame and peak RSS of the process. gc objects per frame comes from
+# the garbage collector's generation-0 counter: gc-tracked containers
+# (lists, dicts, tuples, instances) created and not yet freed, net of frees.
+# Floats, ints, strings and Rects are not tracked, so it is no count of
+# allocations; it is shown for information and not checked against the
+# baseline. A separate process runs micro-benchmarks of
+# getRandomPipe (and reach.py's solvable generator), the collision tests
+# and score-digit rendering.
+#
+# --save writes the results as a baseline; a later run compares against it
+# and exits with status 1 when a hot path got slower by more than
+# --threshold. Baselines are machine specific.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_suite.py" --save      (record a baseline)
+#   python "Flappy Bird/bench_suite.py"             (check against it)
+
+BASELINE = 'bench_baseline.json'
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+THRESHOLD = 0.25
+
+# Metrics checked against the baseline, as (suffix, higher_is_better);
+# gc_objects_per_frame is deliberately not one of them
+CHECKED = [
+    ('/fps', True),
+    ('/frame_mean_ms', False),
+    ('/physics_p50_ms', False),
+    ('/collision_p50_ms', False),
+    ('/draw_p50_ms', False),
+    ('/present_p50_ms', False),
+    ('_ns', False),
+]
+MIN_CHECKED_MS = 0.005  # Phases faster than this are timer noise
+TRACE_OBJECTS = 2  # gc-tracked objects the profiler keeps per frame (tuple + dict)
+
+
+def peakRss():
+    # Peak resident set size in MB, or None where the resource module is missing
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def loopMetrics(name, profiler, run):
+    # Run one game loop and summarize its profiled frames
+    from profiler import summarize
+
+    gc.collect()
+    collections, count = gc.get_stats()[0]['collections'], gc.get_count()[0]
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    frames = len(profiler.trace)
+    tracked = ((gc.get_stats()[0]['collections'] - collections) * gc.get_threshold()[0]
+               + gc.get_count()[0] - count) - TRACE_OBJECTS * frames
+
+    metrics = {f'{name}/frames': frames, f'{name}/fps': frames / elapsed,
+               f'{name}/gc_objects_per_frame': tracked / max(frames, 1)}
+    phases = {}
+    for _, _, frame in profiler.trace:
+        for phase, value in frame.items():
+            phases.setdefault(phase, []).append(value)
+    for phase, values in phases.items():
+        stats = summarize(values)
+        for key in ('p50', 'p95', 'p99', 'max', 'mean'):
+            metrics[f'{name}/{phase}_{key}_ms'] = 1000 * stats[key]
+    return metrics
+
+
+def runLoops(difficulty, frames, seed):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import main_2
+    from calibrate import scriptedPolicy
+    from engine import World, getRandomPipe, DIFFICULTY_SETTINGS
+    from reach import solvablePipes
+    from profiler import FrameProfiler
+    from scores import ScoreStore
+
+    main_2.FPS = 0  # Clock.tick(0) never sleeps
+    main_2.REFRESH_RATE = 0
+    main_2.TIMESTEP.lockstep = True  # One physics step per rendered frame
+    main_2.SCENES.block = False  # Menus poll, so every frame gets its scripted keys
+    main_2.SCENES.redraw = True  # ...and draw, so their fps and draw times measure rendering
+    main_2.ATTRACT_DELAY = 0
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.loadAssets()
+    main_2.AUDIO.wait()
+
+    def scripted(script):
+        # Fresh profiler whose frames start by posting script(frame) events
+        profiler = main_2.PROFILER = main_2.SCENES.profiler = FrameProfiler(trace_limit=None)
+        begin = profiler.beginFrame
+
+        def beginFrame(scene):
+            begin(scene)
+            for key in script(len(profiler.trace)):
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+        profiler.beginFrame = beginFrame
+        return profiler
+
+    def key(frame, keys):
+        # keys: {frame: key}; one scripted press per listed frame
+        return [keys[frame]] if frame in keys else []
+
+    metrics = {}
+    options = list(DIFFICULTY_SETTINGS)
+    presses = {frames - 2 - i: pygame.K_DOWN for i in range(options.index(difficulty))}
+    presses[frames - 1] = pygame.K_RETURN
+    profiler = scripted(lambda frame: key(frame, presses))
+    metrics.update(loopMetrics('difficulty', profiler, main_2.chooseDifficulty))
+    assert main_2.difficulty == difficulty
+
+    profiler = scripted(lambda frame: key(frame, {frames - 1: pygame.K_SPACE}))
+    metrics.update(loopMetrics('welcome', profiler, main_2.welcomeScreen))
+
+    # Scripted player: presses SPACE when the bird drops to the bottom of the
+    # next gap; each game ends after at most 1500 steps
+    worlds = []
+    rng = random.Random(seed)
+
+    class BenchWorld(World):
+        def step(self, flap=False):
+            events = super().step(flap)
+            if self.frame >= 1500 and not self.crashed:
+                self.crashed = True
+                events.append('die')
+            return events
+
+    def newWorld():
+        world = BenchWorld(main_2.difficulty,
+                           player_size=main_2.GAME_SPRITES['player'].get_size(),
+                           pipe_size=main_2.GAME_SPRITES['pipe'][0].get_size(),
+                           base_height=main_2.GAME_SPRITES['base'].get_height(),
+                           collider=main_2.COLLIDER).reset(rng.randrange(2 ** 32))
+        worlds.append((world, scriptedPolicy(world.seed)))
+        return world
+    main_2.newWorld = newWorld
+
+    def play(frame):
+        world, policy = worlds[-1]
+        return [pygame.K_SPACE] if policy(world) else []
+    profiler = scripted(play)
+
+    def games():
+        while len(profiler.trace) < frames:
+            main_2.mainGame()
+    metrics.update(loopMetrics('game', profiler, games))
+    metrics['game/games'] = len(worlds)
+    metrics['game/mean_score'] = statistics.mean(world.score for world, _ in worlds)
+
+    pipe_gap = DIFFICULTY_SETTINGS[difficulty]['pipe_gap']
+    pipe_rng = random.Random(seed)
+    metrics['getRandomPipe_ns'] = perCall(lambda: getRandomPipe(pipe_gap, pipe_rng))
+    generator = solvablePipes(difficulty)
+    metrics['solvablePipe_ns'] = perCall(lambda: generator.next(pipe_rng))
+    metrics['peak_rss_mb'] = peakRss()
+    return {f'{difficulty}/{key}': value for key, value in metrics.items()}
+
+
+def perCall(fn, number=20000):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def runMicro(seed):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from bench_collision import PLAYER, PIPE, boxBroadphase, corridor
+    from collision import MaskCollider
+    from render import SurfaceCache, composeNumber
+
+    pygame.display.set_mode((1, 1))
+    bird = pygame.image.load(PLAYER).convert_alpha()
+    pipe = pygame.image.load(PIPE).convert_alpha()
+    collider = MaskCollider()
+    collider.setSprites(bird, pygame.transform.rotate(pipe, 180), pipe)
+    glyphs = tuple(pygame.image.load(f'gallery/sprites/{i}.png').convert_alpha() for i in range(10))
+
+    metrics = {}
+    for name, gap_bottom in (('gap', 1000), ('edge', 210)):
+        world = corridor(2, 4, gap_bottom)
+        metrics[f'micro/collision_box_{name}_ns'] = perCall(lambda: boxBroadphase(world, 196))
+        metrics[f'micro/collision_mask_{name}_ns'] = perCall(lambda: collider.collide(world, 196))
+    rng = random.Random(seed)
+    metrics['micro/score_digits_compose_ns'] = perCall(lambda: composeNumber(rng.randrange(1000), glyphs), 5000)
+    cache = SurfaceCache()
+    metrics['micro/score_digits_cached_ns'] = perCall(lambda: cache.number(rng.randrange(60), glyphs))
+    return metrics
+
+
+def runChild(target, frames, seed):
+    out = subprocess.run([sys.executable, __file__, '--child', target, '--frames', str(frames),
+                          '--seed', str(seed)], capture_output=True, text=True)
+    if out.returncode:
+        sys.exit(f'benchmark child {target} failed:\n{out.stderr}')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(baseline, results, threshold):
+    # Hot-path metrics that regressed by more than threshold
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        checked = [higher for suffix, higher in CHECKED if name.endswith(suffix)]
+        if not checked or new is None or not old:
+            continue
+        if name.endswith('_ms') and old < MIN_CHECKED_MS:
+            continue
+        change = (old - new) / old if checked[0] else (new - old) / old
+        if change > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def report(results):
+    for difficulty in DIFFICULTIES:
+        print(f"== {difficulty}  (peak RSS {results.get(f'{difficulty}/peak_rss_mb') or 0:.1f} MB, "
+              f"getRandomPipe {results[f'{difficulty}/getRandomPipe_ns']:.0f} ns, "
+              f"solvable {results.get(f'{difficulty}/solvablePipe_ns') or 0:.0f} ns)")
+        for loop in ('difficulty', 'welcome', 'game'):
+            prefix = f'{difficulty}/{loop}/'
+            games = f"  {results[prefix + 'games']:.0f} games, mean score {results[prefix + 'mean_score']:.1f}" \
+                if loop == 'game' else ''
+            print(f"  {loop:<10} {results[prefix + 'fps']:9.0f} fps  "
+                  f"{results[prefix + 'gc_objects_per_frame']:6.1f} gc objects/frame{games}")
+            phases = sorted(name[len(prefix):-len('_p50_ms')] for name in results
+                            if name.startswith(prefix) and name.endswith('_p50_ms'))
+            for phase in phases:
+                print(f"    {phase:<10}" + ''.join(f"  {key} {results[prefix + phase + '_' + key + '_ms']:7.3f}"
+                                               for key in ('p50', 'p95', 'p99', 'max')) + ' ms')
+    print("== micro")
+    for name in sorted(name for name in results if name.startswith('micro/')):
+        print(f"  {name[len('micro/'):]:<28} {results[name]:10.0f} ns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the regression benchmark suite")
+    parser.add_argument('--frames', type=int, default=3000, help='frames per game loop')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark; the median is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child == 'micro':
+            metrics = runMicro(args.seed)
+        else:
+            metrics = runLoops(args.child, args.frames, args.seed)
+        print(json.dumps(metrics))
+        return
+
+    runs = {}
+    for _ in range(args.repeat):
+        for target in DIFFICULTIES + ['micro']:
+            for name, value in runChild(target, args.frames, args.seed).items():
+                runs.setdefault(name, []).append(value)
+    results = {name: statistics.median(values) if None not in values else None for name, values in runs.items()}
+    report(results)
+
+    if args.save:
+        import pygame
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'pygame': pygame.version.ver,
+                       'platform': platform.platform(), 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'frames': args.frames, 'metrics': results}, f, indent=1, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline['metrics'], results, args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.4g} -> {new:.4g} ({change:+.0%} worse)")
+    if regressions:
+        sys.exit(1)
+    print(f"no hot path slower than {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
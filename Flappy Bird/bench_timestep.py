@@ -0,0 +1,76 @@
+import argparse
+import tempfile
+import threading
+import time
+
+from bench_input import SoakWorld, presser
+import main_2
+from scores import ScoreStore
+
+# Frame pacing of the fixed timestep at each refresh rate.
+#
+# Plays the real mainGame() under the SDL dummy drivers for --seconds at
+# each --refresh rate, with SPACE presses posted at random times as in
+# bench_input.py, and prints FixedTimestep's counters (the ones on the F3
+# overlay and in --profile exports): frames, physics steps per second
+# (FPS whatever the refresh rate), late frames (over 1.5x the frame
+# budget), steps dropped when catching up more than max_steps, and steps
+# pulled forward to apply a flap. --stall MS holds every --stall-every'th
+# frame that much longer, to see late frames and dropped steps counted.
+# Usage (from the repo root):
+#   python "Flappy Bird/bench_timestep.py" --seconds 10
+#   python "Flappy Bird/bench_timestep.py" --stall 200 --stall-every 100
+
+
+def run(refresh, seconds, seed, stall, stall_every):
+    main_2.REFRESH_RATE = refresh
+    main_2.TIMESTEP.resetStats()
+
+    def newWorld():
+        world = SoakWorld(main_2.difficulty)
+        world.steps = int(seconds * main_2.FPS)
+        return world.reset(seed)
+    main_2.newWorld = newWorld
+
+    present = main_2.RENDERER.present
+
+    def stalledPresent():
+        present()
+        if stall and main_2.TIMESTEP.frames % stall_every == 0:
+            time.sleep(stall / 1000)
+    main_2.RENDERER.present = stalledPresent
+
+    stop = threading.Event()
+    thread = threading.Thread(target=presser, args=(stop, seed), daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    main_2.mainGame()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    del main_2.RENDERER.present
+    return main_2.TIMESTEP.stats(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count late frames, dropped and pulled steps per refresh rate")
+    parser.add_argument('--refresh', type=int, nargs='+', default=[60, 120, 144], help='rendered frames per second')
+    parser.add_argument('--seconds', type=float, default=10.0, help='play time per refresh rate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stall', type=float, default=0.0, help='ms added to every --stall-every frame')
+    parser.add_argument('--stall-every', type=int, default=100)
+    args = parser.parse_args()
+
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.loadAssets()
+    print(f"{args.seconds:g}s per refresh rate" + (f", {args.stall:g} ms stall every {args.stall_every} frames"
+                                                   if args.stall else ''))
+    for refresh in args.refresh:
+        stats, elapsed = run(refresh, args.seconds, args.seed, args.stall, args.stall_every)
+        print(f"  {refresh:4d} Hz  {stats['frames'] / elapsed:6.1f} fps  {stats['steps'] / elapsed:5.1f} steps/s  "
+              f"late frames {stats['late_frames']}  dropped steps {stats['dropped_steps']}  "
+              f"pulled steps {stats['pulled_steps']}  ({stats['frames']} frames)")
+
+
+if __name__ == '__main__':
+    main()
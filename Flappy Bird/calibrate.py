@@ -0,0 +1,228 @@
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from engine import World, DIFFICULTY_SETTINGS, GRAVITY, FLAP_VELOCITY
+
+# Difficulty calibration: simulate many headless games over a grid of
+# parameters with reference policies, on a process pool.
+#
+# Work is split into chunks of consecutive seeds. Every finished chunk is
+# appended to the results file as one JSON line, so an interrupted sweep
+# picks up where it stopped when rerun with the same arguments.
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/calibrate.py" --games 20000 --policy scripted noisy
+#   python "Flappy Bird/calibrate.py" --difficulty Hard --pipe-gap 110 120 130 --gravity 1 1.2
+
+
+def scriptedPolicy(seed):
+    # Flap as soon as the bird drops to the bottom of the next gap
+    def policy(world):
+        x, gap_top, gap_bottom = world.nextPipe()
+        return world.playery + world.player_height > gap_bottom - 10 and world.bird_velocity_y >= 0
+    return policy
+
+
+def noisyPolicy(seed):
+    # The scripted player with a human-ish reaction delay, an imprecise aim
+    # and the odd accidental flap. Noise is drawn from a per-game RNG so a
+    # game is reproducible from its seed.
+    rng = random.Random(seed * 2654435761 + 1)
+    pending = collections.deque([False], maxlen=2)
+
+    def policy(world):
+        x, gap_top, gap_bottom = world.nextPipe()
+        margin = rng.gauss(28, 6)
+        pending.append(world.playery + world.player_height > gap_bottom - margin
+                       and world.bird_velocity_y >= 0)
+        return pending.popleft() or rng.random() < 0.005
+    return policy
+
+
+POLICIES = {
+    'scripted': scriptedPolicy,
+    'noisy': noisyPolicy,
+}
+
+
+def playGame(settings, policy_name, seed, max_score):
+    world = World(settings=settings).reset(seed)
+    policy = POLICIES[policy_name](seed)
+    step = world.step
+    while not world.crashed and world.score < max_score:
+        step(policy(world))
+    return world.score, world.frame, world.crashed
+
+
+def runChunk(task):
+    start = time.perf_counter()
+    scores = collections.Counter()
+    frames = 0
+    censored = 0
+    for seed in range(task['seed_start'], task['seed_stop']):
+        score, length, crashed = playGame(task['settings'], task['policy'], seed, task['max_score'])
+        scores[score] += 1
+        frames += length
+        censored += not crashed
+    result = dict(task)
+    result.update(scores={str(k): v for k, v in sorted(scores.items())},
+                  frames=frames, censored=censored,
+                  elapsed=time.perf_counter() - start, worker=os.getpid())
+    return result
+
+
+# Task fields that change how the games of a grid point turn out; results
+# only pool (and a chunk only counts as done) when all of them match
+POINT_FIELDS = ('difficulty', 'settings', 'policy', 'max_score')
+
+
+def pointKey(task):
+    return json.dumps({field: task[field] for field in POINT_FIELDS}, sort_keys=True)
+
+
+def chunkKey(task):
+    return pointKey(task), task['seed_start'], task['seed_stop']
+
+
+def pointLabel(task):
+    settings = task['settings']
+    return (f"{task['difficulty']:<8} {settings['pipe_gap']:>4} {settings['pipe_speed']:>5} {settings['gravity']:>5} "
+            f"{settings['flap_velocity']:>5} {task['policy']:<9} {task['max_score']:>5}")
+
+
+def makeTasks(args):
+    tasks = []
+    for difficulty in args.difficulty:
+        profile = DIFFICULTY_SETTINGS[difficulty]
+        grid = itertools.product(args.pipe_gap or [profile['pipe_gap']],
+                                 args.pipe_speed or [profile['pipe_speed']],
+                                 args.gravity, args.flap_velocity, args.policy)
+        for pipe_gap, pipe_speed, gravity, flap_velocity, policy in grid:
+            settings = {'pipe_gap': pipe_gap, 'pipe_speed': pipe_speed,
+                        'gravity': gravity, 'flap_velocity': flap_velocity}
+            for start in range(args.seed, args.seed + args.games, args.chunk):
+                tasks.append({'difficulty': difficulty, 'settings': settings, 'policy': policy,
+                              'seed_start': start,
+                              'seed_stop': min(start + args.chunk, args.seed + args.games),
+                              'max_score': args.max_score})
+    return tasks
+
+
+def loadResults(path):
+    results = []
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass  # Partial line from an interrupted run
+    return results
+
+
+def dropPartialLine(path):
+    # Cuts off a line an interrupted run left unfinished, so the next record
+    # appended starts on a line of its own instead of being lost with it
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def percentile(counts, q):
+    total = sum(counts.values())
+    seen = 0
+    for score in sorted(counts):
+        seen += counts[score]
+        if seen >= q * total:
+            return score
+    return 0
+
+
+def report(results, survival_marks):
+    points = collections.OrderedDict()
+    workers = collections.defaultdict(lambda: [0, 0.0])
+    for result in results:
+        point = points.setdefault(pointKey(result), {'label': pointLabel(result), 'scores': collections.Counter(),
+                                                     'frames': 0, 'censored': 0})
+        for score, count in result['scores'].items():
+            point['scores'][int(score)] += count
+        point['frames'] += result['frames']
+        point['censored'] += result['censored']
+        games = result['seed_stop'] - result['seed_start']
+        workers[result['worker']][0] += games
+        workers[result['worker']][1] += result['elapsed']
+
+    header = f"{'difficulty':<8} {'gap':>4} {'speed':>5} {'grav':>5} {'flap':>5} {'policy':<9} {'cap':>5} {'games':>8} {'mean':>7} {'p50':>5} {'p90':>5} {'p99':>5} {'max':>5}"
+    print(header)
+    for point in points.values():
+        counts = point['scores']
+        games = sum(counts.values())
+        mean = sum(score * n for score, n in counts.items()) / games
+        print(f"{point['label']} {games:>8} {mean:>7.2f} "
+              f"{percentile(counts, 0.5):>5} {percentile(counts, 0.9):>5} {percentile(counts, 0.99):>5} {max(counts):>5}"
+              + (f"  ({point['censored']} hit --max-score)" if point['censored'] else ''))
+
+    print('\nSurvival by pipe (share of games passing at least N pipes)')
+    print(f"{'':<57}" + ''.join(f"{mark:>7}" for mark in survival_marks))
+    for point in points.values():
+        counts = point['scores']
+        games = sum(counts.values())
+        curve = [sum(n for score, n in counts.items() if score >= mark) / games for mark in survival_marks]
+        print(f"{point['label']}          "
+              + ''.join(f"{share:>7.3f}" for share in curve))
+
+    print('\nThroughput per worker')
+    for pid, (games, elapsed) in sorted(workers.items()):
+        print(f"  pid {pid}: {games} games in {elapsed:.1f}s = {games / elapsed:,.0f} runs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate games across a parameter grid and report survival curves")
+    parser.add_argument('--difficulty', nargs='+', default=list(DIFFICULTY_SETTINGS), choices=list(DIFFICULTY_SETTINGS))
+    parser.add_argument('--pipe-gap', type=int, nargs='+', help='override the profile pipe_gap')
+    parser.add_argument('--pipe-speed', type=int, nargs='+', help='override the profile pipe_speed')
+    parser.add_argument('--gravity', type=float, nargs='+', default=[GRAVITY])
+    parser.add_argument('--flap-velocity', type=float, nargs='+', default=[FLAP_VELOCITY])
+    parser.add_argument('--policy', nargs='+', default=['noisy'], choices=list(POLICIES))
+    parser.add_argument('--games', type=int, default=2000, help='games per grid point')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--chunk', type=int, default=250, help='games per task')
+    parser.add_argument('--max-score', type=int, default=200, help='stop (censor) games at this score')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', default='calibration.jsonl', help='results file, appended to and resumed from')
+    parser.add_argument('--survival', type=int, nargs='+', default=[1, 2, 5, 10, 20, 50, 100])
+    args = parser.parse_args()
+
+    results = loadResults(args.out)
+    done = {chunkKey(result) for result in results}
+    todo = [task for task in makeTasks(args) if chunkKey(task) not in done]
+    print(f"{len(done)} chunks already in {args.out}, {len(todo)} to run on {args.workers} workers")
+
+    if todo:
+        start = time.perf_counter()
+        games = 0
+        dropPartialLine(args.out)
+        with open(args.out, 'a') as out, multiprocessing.Pool(args.workers) as pool:
+            for result in pool.imap_unordered(runChunk, todo):
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                results.append(result)
+                games += result['seed_stop'] - result['seed_start']
+        elapsed = time.perf_counter() - start
+        print(f"{games} games in {elapsed:.1f}s ({games / elapsed:,.0f} runs/s total)\n")
+
+    wanted = {pointKey(task) for task in makeTasks(args)}
+    report([result for result in results if pointKey(result) in wanted], args.survival)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+import argparse
+import collections
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from profiler import summarize
+
+# Gameplay video capture that stays off the frame loop.
+#
+# grab() runs right after a frame is presented. It copies SCREEN's pixel
+# buffer as it is (one memcpy through get_buffer(), no format conversion,
+# no image encoding) into a free slot of a preallocated pool and queues the
+# slot for a worker thread, which compresses the frame and writes it out.
+# When every slot is still waiting for the worker the frame is dropped and
+# counted; the game never waits for the disk.
+#
+# Frames go to a .fbv stream: a header with the surface format, then one
+# record per frame holding the raw pixels zlib'd at level 1 (about 20 KB
+# and 2 ms of worker time a frame). XOR deltas against the previous frame
+# were tried: the moving pipes change a sixth of the pixels every frame and
+# the deltas came out larger and slower than whole frames. Records carry
+# the frame number and time, so dropped frames show up as gaps.
+#
+# In clip mode nothing is written as the game goes: the worker keeps the
+# last clip_seconds of records in memory, and clip(name) writes them out.
+# main_2.py saves one when a game sets a new high score.
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/main_2.py" --capture DIR  (every game to DIR/<difficulty>-<time>.fbv)
+#   python "Flappy Bird/main_2.py" --clips DIR    (the last seconds of new high score games)
+#   python "Flappy Bird/capture.py" info DIR/*.fbv
+#   python "Flappy Bird/capture.py" export FILE.fbv OUTDIR  (PNG sequence)
+
+MAGIC = b'FBVS'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHIB4I')  # magic, version, width, height, pitch, bits per pixel, RGBA masks
+RECORD = struct.Struct('<IdI')  # frame, seconds since the first frame, compressed size
+COMPRESS_LEVEL = 1  # zlib level; higher levels cost the worker several times more for a few % less
+SLOTS = 8  # frames that can wait for the worker before grab() drops
+CLIP_SECONDS = 10.0
+STATS_WINDOW = 3600  # grab/encode times kept for the percentiles
+
+
+def surfaceFormat(surface):
+    width, height = surface.get_size()
+    return (width, height, surface.get_pitch(), surface.get_bitsize()) + tuple(surface.get_masks())
+
+
+class FrameCapture:
+
+    def __init__(self, directory, clip_seconds=None, slots=SLOTS, level=COMPRESS_LEVEL):
+        # clip_seconds: None writes every frame between begin() and end();
+        # a number keeps only that many seconds in memory for clip()
+        self.directory = directory
+        self.clip_seconds = clip_seconds
+        self.level = level
+        self.slots = slots
+        self.format = None
+        self.pool = []
+        self.free = collections.deque()  # Slots grab() may fill; the worker hands them back
+        # Never full of frames (at most 'slots' are out), the extra room is for commands
+        self.queue = queue.Queue(maxsize=slots + 4)
+        self.active = False
+        self.frame = 0
+        self.origin = 0.0
+
+        self.grabbed = 0
+        self.dropped = 0
+        self.written = 0
+        self.clips = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.grab_times = collections.deque(maxlen=STATS_WINDOW)
+        self.encode_times = collections.deque(maxlen=STATS_WINDOW)
+
+        # Worker state
+        self.file = None
+        self.header = None
+        self.ring = collections.deque()  # Clip mode: (seconds, record, data) of the kept frames
+        self.thread = threading.Thread(target=self.run, name='capture', daemon=True)
+        self.thread.start()
+
+    def begin(self, surface, name):
+        # Starts a recording of surface's frames (clip mode: forgets the last one)
+        fmt = surfaceFormat(surface)
+        if fmt != self.format:
+            size = surface.get_pitch() * surface.get_height()
+            # The worker may still hold slots of the old size; let it finish first
+            self.queue.join()
+            self.format = fmt
+            self.pool = [np.empty(size, dtype=np.uint8) for _ in range(self.slots)]
+            self.free = collections.deque(range(self.slots))
+        self.queue.put(('begin', fmt, name))
+        self.active = True
+        self.frame = 0
+        self.origin = time.perf_counter()
+
+    def grab(self, surface):
+        # Call after the frame is on screen; costs one copy of the pixels
+        if not self.active:
+            return
+        start = time.perf_counter()
+        self.frame += 1
+        try:
+            slot = self.free.popleft()
+        except IndexError:
+            self.dropped += 1
+            return
+        buffer = surface.get_buffer()
+        np.copyto(self.pool[slot], np.frombuffer(buffer, dtype=np.uint8))
+        del buffer  # Unlocks the surface
+        self.queue.put_nowait(('frame', slot, self.frame - 1, start - self.origin))
+        self.grabbed += 1
+        self.grab_times.append(time.perf_counter() - start)
+
+    def end(self):
+        if self.active:
+            self.active = False
+            self.queue.put(('end',))
+
+    def clip(self, name):
+        # Clip mode: writes the kept seconds of the last recording to directory/name.fbv
+        if self.clip_seconds is not None and self.format is not None:
+            self.queue.put(('clip', name))
+
+    def close(self):
+        # Writes everything still queued and stops the worker
+        self.end()
+        if self.thread.is_alive():
+            self.queue.put(('stop',))
+            self.thread.join()
+
+    def stats(self):
+        grab, encode = summarize(self.grab_times), summarize(self.encode_times)
+        frames = self.grabbed + self.dropped
+        return {'frames': frames, 'grabbed': self.grabbed, 'dropped': self.dropped,
+                'drop_rate': self.dropped / frames if frames else 0.0, 'written': self.written,
+                'clips': self.clips,
+                'grab_p50_ms': 1000 * grab['p50'], 'grab_p95_ms': 1000 * grab['p95'],
+                'grab_max_ms': 1000 * grab['max'], 'encode_mean_ms': 1000 * encode['mean'],
+                'encode_p95_ms': 1000 * encode['p95'],
+                'bytes_per_frame': self.compressed_bytes / self.written if self.written else 0.0,
+                'ratio': self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0}
+
+    def report(self):
+        stats = self.stats()
+        print(f"Capture: {stats['grabbed']}/{stats['frames']} frames grabbed ({stats['dropped']} dropped), "
+              f"grab p50 {stats['grab_p50_ms']:.3f} ms p95 {stats['grab_p95_ms']:.3f} ms "
+              f"max {stats['grab_max_ms']:.3f} ms per frame; worker {stats['encode_mean_ms']:.2f} ms per frame, "
+              f"{stats['bytes_per_frame'] / 1024:.1f} KB per frame ({stats['ratio']:.0f}x)")
+
+    # Worker thread
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item[0] == 'frame':
+                    self.encode(*item[1:])
+                elif item[0] == 'begin':
+                    self.startRecording(*item[1:])
+                elif item[0] == 'end':
+                    self.closeFile()
+                elif item[0] == 'clip':
+                    self.writeClip(item[1])
+                else:
+                    self.closeFile()
+                    return
+            except OSError as e:
+                print(f"Error writing capture: {e}")
+                self.file = None
+            finally:
+                self.queue.task_done()
+
+    def startRecording(self, fmt, name):
+        self.closeFile()
+        self.header = HEADER.pack(MAGIC, VERSION, *fmt)
+        self.ring.clear()
+        if self.clip_seconds is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.file = open(os.path.join(self.directory, f'{name}.fbv'), 'wb')
+            self.file.write(self.header)
+
+    def encode(self, slot, frame, seconds):
+        start = time.perf_counter()
+        data = zlib.compress(self.pool[slot], self.level)
+        self.free.append(slot)
+
+        record = RECORD.pack(frame, seconds, len(data))
+        if self.clip_seconds is None:
+            if self.file is not None:
+                self.file.write(record)
+                self.file.write(data)
+        else:
+            ring = self.ring
+            ring.append((seconds, record, data))
+            while ring[0][0] < seconds - self.clip_seconds:
+                ring.popleft()
+        self.written += 1
+        self.raw_bytes += self.pool[slot].nbytes
+        self.compressed_bytes += len(data)
+        self.encode_times.append(time.perf_counter() - start)
+
+    def writeClip(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{name}.fbv')
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(self.header)
+            for _, record, data in self.ring:
+                f.write(record)
+                f.write(data)
+        os.replace(temp, path)
+        self.clips += 1
+
+    def closeFile(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def readFrames(path):
+    # Yields (frame, seconds, raw pixels) of a .fbv file, and first its format
+    with open(path, 'rb') as f:
+        magic, version, *fmt = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} capture")
+        yield tuple(fmt)
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            frame, seconds, size = RECORD.unpack(head)
+            yield frame, seconds, np.frombuffer(zlib.decompress(f.read(size)), dtype=np.uint8)
+
+
+def toSurface(fmt, pixels):
+    import pygame
+
+    width, height, pitch, bitsize, *masks = fmt
+    surface = pygame.Surface((width, height), 0, bitsize, masks)
+    row = width * surface.get_bytesize()
+    rows = pixels.reshape(height, pitch)[:, :row]
+    target = surface.get_pitch()
+    buffer = surface.get_buffer()
+    if target == row:
+        buffer.write(rows.tobytes())
+    else:
+        for y in range(height):
+            buffer.write(rows[y].tobytes(), y * target)
+    del buffer
+    return surface
+
+
+def info(paths):
+    for path in paths:
+        frames = readFrames(path)
+        width, height, pitch, *_ = next(frames)
+        count = last = dropped = 0
+        seconds = 0.0
+        for frame, seconds, _ in frames:
+            if count:
+                dropped += frame - last - 1
+            count += 1
+            last = frame
+        size = os.path.getsize(path)
+        print(f"{path}: {width}x{height}, {count} frames over {seconds:.1f}s, {dropped} dropped, "
+              f"{size / 1024:.0f} KB ({size / max(count, 1) / 1024:.1f} KB per frame, "
+              f"{count * pitch * height / max(size, 1):.0f}x)")
+
+
+def export(path, directory):
+    import pygame
+
+    os.makedirs(directory, exist_ok=True)
+    frames = readFrames(path)
+    fmt = next(frames)
+    count = 0
+    for frame, _, pixels in frames:
+        pygame.image.save(toSurface(fmt, pixels), os.path.join(directory, f'{frame:06d}.png'))
+        count += 1
+    print(f"{count} frames -> {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and export gameplay captures")
+    parser.add_argument('command', choices=['info', 'export'])
+    parser.add_argument('path', nargs='+', help='.fbv files (export: one file, then the output directory)')
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        info(args.path)
+    else:
+        if len(args.path) != 2:
+            parser.error('export takes FILE.fbv OUTDIR')
+        export(*args.path)
+
+
+if __name__ == '__main__':
+    main()
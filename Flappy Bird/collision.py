@@ -0,0 +1,91 @@
+import math
+
+import pygame
+
+# Pixel-exact bird/pipe collision for engine.World (World(collider=...)).
+#
+# Broadphase: pipes are stored front to back, so the scan skips columns
+# that ended left of the bird and stops at the first one starting right of
+# it, and a bird box inside a column's gap is clear; only boxes reaching
+# into a pipe go on to the narrowphase.
+# Narrowphase: pygame.mask overlap against masks built once per sprite, so
+# the transparent corners of the bird and the pipe lips are not hits.
+# Swept: the bird mask is smeared along its motion relative to the pipes
+# since the previous test, so a fast bird cannot step over a pipe between
+# two frames. Smeared masks are cached by displacement.
+
+
+class MaskCollider:
+
+    def __init__(self, swept=True, cache_size=256):
+        self.swept = swept
+        self.cache_size = cache_size
+        self.bird = self.upper = self.lower = None
+        self.sweeps = {}
+        self.counters = {'tests': 0, 'narrowphase': 0, 'hits': 0}
+
+    def setSprites(self, bird, upper_pipe, lower_pipe):
+        self.bird = pygame.mask.from_surface(bird)
+        self.upper = pygame.mask.from_surface(upper_pipe)
+        self.lower = pygame.mask.from_surface(lower_pipe)
+        self.sweeps = {}
+
+    def sweep(self, dx, dy):
+        # Bird mask moved from (-dx, -dy) to (0, 0) one pixel at a time;
+        # returns (mask, ox, oy), the mask origin relative to the bird
+        key = (dx, dy)
+        if key not in self.sweeps:
+            width, height = self.bird.get_size()
+            ox, oy = min(0, -dx), min(0, -dy)
+            mask = pygame.mask.Mask((width + abs(dx), height + abs(dy)))
+            n = max(abs(dx), abs(dy))
+            for k in range(n + 1):
+                t = 1 - k / n if n else 0
+                mask.draw(self.bird, (round(-dx * t) - ox, round(-dy * t) - oy))
+            if len(self.sweeps) >= self.cache_size:
+                self.sweeps.clear()
+            self.sweeps[key] = (mask, ox, oy)
+        return self.sweeps[key]
+
+    def collide(self, world, prev_playery):
+        self.counters['tests'] += 1
+        left, top = int(world.playerx), int(world.playery)
+        if self.swept:
+            # Pipes have moved pipe_speed since the previous test (not before the first one)
+            dx = math.ceil(world.pipe_speed) if world.frame > 1 else 0
+            mask, ox, oy = self.sweep(dx, top - int(prev_playery))
+            left += ox
+            top += oy
+        else:
+            mask = self.bird
+        width, height = mask.get_size()
+        right, bottom = left + width, top + height
+
+        pipes = world.pipes
+        xs, tops, bottoms = pipes.x, pipes.gap_top, pipes.gap_bottom
+        pipe_width, pipe_height = world.pipe_width, world.pipe_height
+        for i in pipes.order:
+            x = xs[i]
+            if x >= right:
+                break
+            if x + pipe_width <= left:
+                continue
+            gap_top, gap_bottom = int(tops[i]), int(bottoms[i])
+            if top >= gap_top and bottom <= gap_bottom:
+                continue  # Inside the gap, clear of both pipes
+            self.counters['narrowphase'] += 1
+            x = int(x) - left
+            if (mask.overlap(self.upper, (x, gap_top - pipe_height - top))
+                    or mask.overlap(self.lower, (x, gap_bottom - top))):
+                self.counters['hits'] += 1
+                return True
+        return False
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['sweeps_cached'] = len(self.sweeps)
+        return stats
+
+    def resetStats(self):
+        for key in self.counters:
+            self.counters[key] = 0
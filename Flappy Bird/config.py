@@ -0,0 +1,30 @@
+# Game settings, for the game and for tools that need them without it.
+#
+# Plain data with no imports, so importing this module costs nothing and
+# starts nothing. main_2.py imports these names into its own globals,
+# where benchmarks and tools override them (main_2.FPS = 0 and the like).
+# The game rules (screen size, difficulty profiles, bird physics) live
+# with the simulation in engine.py.
+
+FPS = 32  # Simulation steps per second; game balance is tuned for this rate
+REFRESH_RATE = 60  # Rendered frames per second during gameplay
+
+# Seconds idle on the welcome screen before the autopilot plays a demo
+# game (see autopilot.py, --attract); 0 turns attract mode off
+ATTRACT_DELAY = 15
+
+# Game Assets
+PLAYER = 'gallery/sprites/redbird-upflap.png'
+BACKGROUND = 'gallery/sprites/background-day.png'
+PIPE = 'gallery/sprites/pipe-green.png'
+SOUNDS = {
+    'die': 'gallery/audio/die.wav',
+    'hit': 'gallery/audio/hit.wav',
+    'point': 'gallery/audio/point.wav',
+    'swoosh': 'gallery/audio/swoosh.wav',
+    'wing': 'gallery/audio/wing.wav',
+    'new_high_score': 'gallery/audio/celebration.wav',
+}
+
+# The old single high score file; it seeds the per-difficulty boards
+HIGH_SCORE_FILE = "high_score.txt"
@@ -0,0 +1,204 @@
+import random
+
+from pipestore import PipeStore
+
+# Headless game rules shared by mainGame() and any simulation/bot code.
+# Nothing in here touches pygame: no display, no mixer, no clock.
+
+SCREENWIDTH = 289
+SCREENHEIGHT = 511
+GROUNDY = int(SCREENHEIGHT * 0.8)
+
+# Sprite dimensions of the default assets (redbird-upflap.png, pipe-green.png, base.png)
+PLAYER_WIDTH = 34
+PLAYER_HEIGHT = 24
+PIPE_WIDTH = 52
+PIPE_HEIGHT = 320
+BASE_HEIGHT = 112
+
+# Difficulty levels
+DIFFICULTY_SETTINGS = {
+    'Easy': {'pipe_gap': 160, 'pipe_speed': 3},
+    'Medium': {'pipe_gap': 140, 'pipe_speed': 4},
+    'Hard': {'pipe_gap': 120, 'pipe_speed': 5},
+}
+
+# Bird physics (per frame)
+START_VELOCITY_Y = -9
+MAX_VELOCITY_Y = 10
+GRAVITY = 1
+FLAP_VELOCITY = -9
+
+
+def getRandomPipe(pipe_gap, rng=random, pipe_height=PIPE_HEIGHT, base_height=BASE_HEIGHT):
+    # Calculate minimum and maximum y positions for the gap center
+    min_y = pipe_gap // 2 + 50  # Added buffer to prevent pipes from touching top/bottom
+    max_y = SCREENHEIGHT - base_height - pipe_gap // 2 - 50  # Added buffer
+
+    # Ensure valid range
+    if min_y > max_y:
+        min_y = max_y
+
+    # Randomly select gap center
+    center_y = rng.randint(min_y, max_y)
+
+    # Calculate pipe positions
+    upper_pipe_y = center_y - pipe_gap // 2 - pipe_height
+    lower_pipe_y = center_y + pipe_gap // 2
+
+    pipeX = SCREENWIDTH + 10
+    pipe = [
+        {'x': pipeX, 'y': upper_pipe_y},  # Upper pipe
+        {'x': pipeX, 'y': lower_pipe_y}   # Lower pipe
+    ]
+    return pipe
+
+
+class World:
+    """One game of Flappy Bird, advanced one frame at a time by step().
+
+    step() returns the names of the sounds mainGame would have played on
+    that frame ('wing', 'hit', 'die', 'point'), so callers with a mixer can
+    play them and headless callers can ignore them.
+    """
+
+    def __init__(self, difficulty='Medium', player_size=(PLAYER_WIDTH, PLAYER_HEIGHT),
+                 pipe_size=(PIPE_WIDTH, PIPE_HEIGHT), base_height=BASE_HEIGHT, settings=None,
+                 collider=None, pipe_generator=None):
+        # settings overrides the difficulty profile; besides pipe_gap and
+        # pipe_speed it may set gravity, flap_velocity and max_velocity_y.
+        # collider replaces the bounding-box pipe test, e.g. a
+        # collision.MaskCollider; it is called as collider.collide(world, prev_playery)
+        # pipe_generator replaces getRandomPipe, e.g. a reach.SolvablePipes;
+        # it is called as pipe_generator.next(rng, pipe_height) and reset with the world
+        self.difficulty = difficulty
+        if settings is None:
+            settings = DIFFICULTY_SETTINGS[difficulty]
+        self.pipe_gap = settings['pipe_gap']
+        self.pipe_speed = settings['pipe_speed']
+        self.player_width, self.player_height = player_size
+        self.pipe_width, self.pipe_height = pipe_size
+        self.base_height = base_height
+
+        self.max_velocity_y = settings.get('max_velocity_y', MAX_VELOCITY_Y)
+        self.gravity = settings.get('gravity', GRAVITY)
+        self.flap_velocity = settings.get('flap_velocity', FLAP_VELOCITY)
+        self.pipe_spacing = SCREENWIDTH * 0.8
+        self.collider = collider
+        self.pipe_generator = pipe_generator
+
+        self.rng = random.Random()
+        self.pipes = PipeStore()
+        self.reset()
+
+    def newPipe(self):
+        if self.pipe_generator is not None:
+            return self.pipe_generator.next(self.rng, self.pipe_height)
+        return getRandomPipe(self.pipe_gap, self.rng, self.pipe_height, self.base_height)
+
+    def spawnPipe(self, x):
+        newpipe = self.newPipe()
+        self.pipes.push(x, newpipe[0]['y'] + self.pipe_height, newpipe[1]['y'])
+
+    def reset(self, seed=None):
+        # Pipes come from their own RNG stream; without a seed one is drawn
+        # so that every game can be replayed from self.seed
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng.seed(seed)
+
+        self.score = 0
+        self.frame = 0
+        self.crashed = False
+        self.playerx = int(SCREENWIDTH / 5)
+        self.playery = int(SCREENHEIGHT / 2)
+        self.bird_velocity_y = START_VELOCITY_Y
+
+        # Generate initial pipes
+        self.pipes.clear()
+        if self.pipe_generator is not None:
+            self.pipe_generator.reset()
+        self.spawnPipe(SCREENWIDTH + 200)
+        self.spawnPipe(SCREENWIDTH + 200 + self.pipe_spacing)
+        return self
+
+    def nextPipe(self):
+        # (x, gap_top, gap_bottom) of the first pipe pair the bird has not cleared yet
+        for pipe in self.pipes:
+            if pipe[0] + self.pipe_width > self.playerx:
+                return pipe
+        return pipe
+
+    def step(self, flap=False):
+        if self.crashed:
+            return []
+        events = []
+        self.frame += 1
+
+        bird_flapped = False
+        if flap and self.playery > 0:
+            self.bird_velocity_y = self.flap_velocity
+            bird_flapped = True
+            events.append('wing')
+
+        if self.bird_velocity_y < self.max_velocity_y and not bird_flapped:
+            self.bird_velocity_y += self.gravity
+
+        prev_playery = self.playery
+        self.playery += min(self.bird_velocity_y, GROUNDY - self.playery - self.player_height)
+
+        # Collision detection; pipes are front to back, so stop at the first
+        # one starting right of the bird
+        playerx, playery = self.playerx, self.playery
+        pipes = self.pipes
+        xs, tops, bottoms = pipes.x, pipes.gap_top, pipes.gap_bottom
+        if self.collider is not None:
+            hit = self.collider.collide(self, prev_playery)
+        else:
+            hit = False
+            right = playerx + self.player_width
+            for i in pipes.order:
+                if xs[i] >= right:
+                    break
+                if playerx < xs[i] + self.pipe_width:
+                    if playery < tops[i] or playery + self.player_height > bottoms[i]:
+                        hit = True
+                        break
+        if hit:
+            self.crashed = True
+            events.append('hit')
+            return events
+
+        if playery > GROUNDY - 25:
+            self.crashed = True
+            events.append('die')
+            return events
+
+        # Move pipes
+        pipes.move(self.pipe_speed)
+
+        # Add new pipe when the first pipe is about to leave the screen
+        if pipes.cull(-self.pipe_width):
+            self.spawnPipe(xs[pipes.last()] + self.pipe_spacing)
+
+        # Score
+        playerMidPos = playerx + self.player_width / 2
+        for i in pipes.order:
+            pipeMidPos = xs[i] + self.pipe_width / 2
+            if pipeMidPos <= playerMidPos < pipeMidPos + self.pipe_speed:
+                self.score += 1
+                events.append('point')
+
+        return events
+
+
+def runGame(policy, difficulty='Medium', seed=None, max_frames=None, settings=None):
+    # Play one game headless; policy(world) returns True to flap
+    world = World(difficulty, settings=settings).reset(seed)
+    step = world.step
+    while not world.crashed:
+        step(policy(world))
+        if max_frames is not None and world.frame >= max_frames:
+            break
+    return world
@@ -0,0 +1,290 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from itertools import repeat
+
+import numpy as np
+
+from engine import World, DIFFICULTY_SETTINGS
+import replay
+
+# Ghost racing: past runs on one pipe sequence, drawn as see-through birds.
+#
+# A track is a difficulty, a pipe seed and a pipe generator, the things
+# that make two games deal the same pipes. A ghost is one run on it, kept
+# as nothing but the bird's y on every frame (int16). The bird's x never
+# changes, so that is all it takes to draw one.
+#
+# In a .fbg file the ghosts are sorted longest first and stored frame by
+# frame: row f holds the y of every ghost still flying on frame f, and
+# since the short runs end first those are always the first alive[f]
+# ghosts. A frame's ghosts are one contiguous row, read through a memory
+# map, so a race only pages in the frames it gets to. GhostTrack.frame()
+# gives the row and positions() the interpolated ys.
+#
+# The game draws them with one Surface.blits call of pre-tinted sprites.
+# Ghosts bunch up (500 runs flap through the same gaps), and k copies of
+# a sprite on one spot blend exactly like one copy whose per-pixel alpha is
+# 1 - (1 - a)^k, so ghostSprites() makes one sprite per stack height and
+# blitSequence() blits each distinct y once: about a sixth of the blits.
+# Only the order in which overlapping ghosts at different ys blend changes.
+#
+# File layout (little-endian):
+#   header  magic 'FBGH', version u8, pipes u8, seed u64, ghost count u32,
+#           difficulty length u8, then the difficulty name (utf-8)
+#   body    ghost lengths in frames, u32 each, longest first, then the
+#           ys as int16, frame by frame
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/main_2.py" --race ghosts.fbg  (race the track; each finished game joins it)
+#   python "Flappy Bird/ghosts.py" build replays --out ghosts  (one track per seed among the replays)
+#   python "Flappy Bird/ghosts.py" generate ghosts.fbg --runs 500 --difficulty Easy  (bot ghosts)
+#   python "Flappy Bird/ghosts.py" info ghosts.fbg
+
+MAGIC = b'FBGH'
+VERSION = 1
+HEADER = struct.Struct('<4sBBQIB')
+EXTENSION = '.fbg'
+
+GHOST_TINT = (150, 200, 255)  # Multiplied into the bird's colours
+GHOST_ALPHA = 70  # Opacity of one ghost, 0-255; a crowd on the same spot adds up
+GHOST_STACK = 16  # Stack heights with a sprite of their own; taller stacks look the same (opaque)
+MAX_FRAMES = 20000  # Longest run kept; bots that never die are cut here
+
+
+class GhostTrack:
+
+    def __init__(self, difficulty, seed, pipes, lengths=(), data=None):
+        # lengths: frames of every ghost, longest first; data: the ys, frame by frame
+        self.difficulty = difficulty
+        self.seed = seed
+        self.pipes = pipes
+        self.lengths = np.asarray(lengths, dtype=np.uint32)
+        self.data = np.zeros(0, dtype=np.int16) if data is None else data
+        frames = int(self.lengths[0]) if len(self.lengths) else 0
+        ended = np.cumsum(np.bincount(self.lengths, minlength=frames + 1))[:frames]
+        self.alive = len(self.lengths) - ended  # Ghosts still flying on each frame
+        self.offsets = np.concatenate(([0], np.cumsum(self.alive)))
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def fromRuns(cls, difficulty, seed, pipes, runs):
+        # runs: the y trajectory of each ghost, in any order
+        runs = sorted(runs, key=len, reverse=True)
+        lengths = [len(run) for run in runs]
+        frames = lengths[0] if runs else 0
+        padded = np.zeros((len(runs), frames), dtype=np.int16)
+        for i, run in enumerate(runs):
+            padded[i, :len(run)] = run
+        flying = np.arange(frames) < np.array(lengths, dtype=np.int64)[:, None]
+        return cls(difficulty, seed, pipes, lengths, padded.T[flying.T])
+
+    def runs(self):
+        # Every ghost's trajectory, longest first
+        frames = len(self.alive)
+        padded = np.zeros((frames, len(self)), dtype=np.int16)
+        flying = np.arange(len(self)) < self.alive[:, None]
+        padded[flying] = self.data
+        return [padded[:length, i] for i, length in enumerate(self.lengths)]
+
+    def frame(self, frame):
+        # ys of the ghosts still flying on this frame, longest runs first
+        if frame >= len(self.alive):
+            return self.data[:0]
+        return self.data[self.offsets[frame]:self.offsets[frame + 1]]
+
+    def positions(self, frame, alpha=1.0):
+        # ys to draw at, 'alpha' of the way from the last frame to this one
+        current = self.frame(frame)
+        if frame == 0 or alpha >= 1.0 or not len(current):
+            return np.asarray(current, dtype=np.int32)
+        previous = self.frame(frame - 1)[:len(current)].astype(np.float32)
+        return (previous + (current - previous) * alpha).astype(np.int32)
+
+    def race(self, world):
+        # Puts world on this track: same pipe generator, reset with the track's seed
+        if replay.pipesOf(world.pipe_generator) != self.pipes:
+            world.pipe_generator = replay.pipeGenerator(self.pipes, self.difficulty)
+        return world.reset(self.seed)
+
+    def encode(self):
+        name = self.difficulty.encode('utf-8')
+        return (HEADER.pack(MAGIC, VERSION, self.pipes, self.seed, len(self), len(name)) + name
+                + self.lengths.astype('<u4').tobytes() + np.asarray(self.data, dtype='<i2').tobytes())
+
+    def save(self, path):
+        # Atomic, so a race that has the old file mapped keeps reading it
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(self.encode())
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        # The ys stay on disk, memory-mapped, until a frame reads them
+        with open(path, 'rb') as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise replay.ReplayError('ghost track is truncated')
+            magic, version, pipes, seed, count, length = HEADER.unpack(head)
+            if magic != MAGIC:
+                raise replay.ReplayError('not a ghost track')
+            if version != VERSION:
+                raise replay.ReplayError(f'unsupported ghost track version {version}')
+            difficulty = f.read(length).decode('utf-8')
+            lengths = np.frombuffer(f.read(4 * count), dtype='<u4')
+        if len(lengths) < count:
+            raise replay.ReplayError('ghost track is truncated')
+        total = int(lengths.sum(dtype=np.int64))
+        offset = HEADER.size + length + 4 * count
+        if os.path.getsize(path) < offset + 2 * total:
+            raise replay.ReplayError('ghost track is truncated')
+        data = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(total,)) if total else None
+        return cls(difficulty, seed, pipes, lengths, data)
+
+    def close(self):
+        # Drops the memory map (Windows will not replace a mapped file)
+        self.data = None
+
+
+def loadTrack(path):
+    # The track in path, or None if there is none yet
+    try:
+        return GhostTrack.load(path)
+    except FileNotFoundError:
+        return None
+
+
+def trajectory(game, collider=None, max_frames=MAX_FRAMES):
+    # A replay's y on every frame, from the start position to its death
+    world = replay.ReplayWorld(game, collider=collider)
+    ys = [world.playery]
+    step = world.step
+    while not world.crashed and world.frame < max_frames:
+        step()
+        ys.append(world.playery)
+    return np.array(ys).round().astype(np.int16)
+
+
+def trackOf(game):
+    return game.difficulty, game.seed, game.pipes
+
+
+def addRun(path, game, collider=None):
+    # Adds a finished game to the track in path, starting one if there is none
+    track = loadTrack(path)
+    runs = []
+    if track is not None:
+        if (track.difficulty, track.seed, track.pipes) != trackOf(game):
+            raise replay.ReplayError(f'{path} is a track for another game')
+        runs = track.runs()
+    runs.append(trajectory(game, collider))
+    GhostTrack.fromRuns(*trackOf(game), runs).save(path)
+    return len(runs)
+
+
+def ghostSprites(sprite, tint=GHOST_TINT, alpha=GHOST_ALPHA, stack=GHOST_STACK):
+    # The bird tinted and faded; sprites[k - 1] looks like k ghosts on one spot
+    import pygame
+
+    ghost = sprite.convert_alpha()
+    ghost.fill(tint + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+    opacity = pygame.surfarray.array_alpha(ghost) / 255 * (alpha / 255)
+    sprites = []
+    for k in range(1, stack + 1):
+        stacked = ghost.copy()
+        pixels = pygame.surfarray.pixels_alpha(stacked)
+        pixels[...] = np.round(255 * (1 - (1 - opacity) ** k))
+        del pixels  # Unlocks the surface
+        sprites.append(stacked)
+    return sprites
+
+
+def blitSequence(sprites, x, ys):
+    # (sprite, (x, y)) pairs for Surface.blits: one per distinct y, with the
+    # sprite for the number of ghosts there
+    ys, counts = np.unique(ys, return_counts=True)
+    np.minimum(counts, len(sprites), out=counts)
+    return zip(map(sprites.__getitem__, (counts - 1).tolist()), zip(repeat(x), ys.tolist()))
+
+
+def build(paths, directory):
+    # One track per (difficulty, seed, pipes) among the replays, with every run on it
+    groups = {}
+    for path in replay.replayFiles(paths):
+        try:
+            game = replay.Replay.load(path)
+        except (OSError, replay.ReplayError) as e:
+            print(f"{path}: {e}")
+            continue
+        groups.setdefault(trackOf(game), []).append(game)
+    os.makedirs(directory, exist_ok=True)
+    for (difficulty, seed, pipes), games in sorted(groups.items(), key=lambda item: -len(item[1])):
+        runs = [trajectory(game, replay.loadCollider(game.collision)) for game in games]
+        path = os.path.join(directory, f'{difficulty}-{seed:x}{EXTENSION}')
+        GhostTrack.fromRuns(difficulty, seed, pipes, runs).save(path)
+        print(f"{len(runs)} ghosts -> {path}")
+
+
+def generate(path, runs, difficulty, seed, max_frames):
+    # Bot ghosts (calibrate's noisy player, a different noise seed per run)
+    from calibrate import noisyPolicy
+
+    trajectories = []
+    for run in range(runs):
+        world = World(difficulty).reset(seed)
+        policy = noisyPolicy(run)
+        ys = [world.playery]
+        while not world.crashed and world.frame < max_frames:
+            world.step(policy(world))
+            ys.append(world.playery)
+        trajectories.append(np.array(ys).round().astype(np.int16))
+    GhostTrack.fromRuns(difficulty, seed, replay.RANDOM_PIPES, trajectories).save(path)
+    print(f"{runs} ghosts -> {path}")
+
+
+def info(paths):
+    for path in paths:
+        start = time.perf_counter()
+        track = GhostTrack.load(path)
+        elapsed = time.perf_counter() - start
+        lengths = track.lengths
+        print(f"{path}: {track.difficulty}, seed {track.seed:x}, pipes {track.pipes}, {len(track)} ghosts, "
+              f"frames {int(lengths.min()) if len(lengths) else 0}-{int(lengths.max()) if len(lengths) else 0} "
+              f"(median {float(np.median(lengths)) if len(lengths) else 0:.0f}), "
+              f"{os.path.getsize(path) / 1024:.0f} KB, opened in {1000 * elapsed:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect ghost tracks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('build', help='one track per seed from recorded replays')
+    command.add_argument('paths', nargs='+', help='replay files or directories')
+    command.add_argument('--out', default='ghosts', help='directory for the tracks')
+    command = commands.add_parser('generate', help='a track of bot runs')
+    command.add_argument('path')
+    command.add_argument('--runs', type=int, default=500)
+    command.add_argument('--difficulty', default='Easy', choices=list(DIFFICULTY_SETTINGS))
+    command.add_argument('--seed', type=int, default=0, help='pipe seed of the track')
+    command.add_argument('--frames', type=int, default=MAX_FRAMES, help='longest run')
+    command = commands.add_parser('info', help='summarize tracks')
+    command.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build(args.paths, args.out)
+    elif args.command == 'generate':
+        generate(args.path, args.runs, args.difficulty, args.seed, args.frames)
+    else:
+        try:
+            info(args.paths)
+        except (OSError, replay.ReplayError) as e:
+            sys.exit(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import collections
+import time
+
+import pygame
+from pygame.locals import KEYDOWN, K_SPACE, K_UP
+
+# Timestamped input for the gameplay loop.
+#
+# Flap presses are stamped when they are polled (or with the event's own
+# 'timestamp' attribute, in perf_counter seconds, when it has one). While a
+# frame waits for its deadline the queue keeps polling about every
+# millisecond instead of sleeping, so stamps are accurate to ~1 ms rather
+# than to one frame. Each fixed physics step then takes the presses made up
+# to its own point in time, so presses that land in different steps of one
+# frame are no longer merged into a single flap. A press made after the
+# last due step wakes the loop at once and pulls the next step forward
+# (see FixedTimestep.pull), so the velocity changes within about a
+# millisecond instead of at the next 31 ms step boundary.
+#
+# pygame's key events carry no timestamp, so a real press is stamped when
+# it is polled: late by up to a millisecond with sub-frame polling, by up
+# to a frame with --frame-input. Press-to-flap latency measured from such
+# stamps would leave that delay out, so the game records none (measure is
+# off); bench_input.py turns it on and posts presses stamped when made.
+
+FLAP_KEYS = (K_SPACE, K_UP)
+
+
+class LatencyHistogram:
+    # Press-to-velocity-change latency in 1 ms buckets
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+
+    def record(self, seconds):
+        self.buckets[int(seconds * 1000)] += 1
+        self.count += 1
+
+    def percentile(self, q):
+        seen = 0
+        for ms in sorted(self.buckets):
+            seen += self.buckets[ms]
+            if seen >= q * self.count:
+                return ms
+        return 0
+
+    def report(self, width=40):
+        if not self.count:
+            return ['no flaps recorded']
+        lines = [f"flaps {self.count}  p50 {self.percentile(0.5)} ms  p95 {self.percentile(0.95)} ms"
+                 f"  p99 {self.percentile(0.99)} ms  max {max(self.buckets)} ms"]
+        step = 2 if max(self.buckets) < 40 else 5
+        rows = [(start, sum(self.buckets[ms] for ms in range(start, start + step)))
+                for start in range(0, max(self.buckets) + 1, step)]
+        peak = max(n for start, n in rows)
+        for start, n in rows:
+            lines.append(f"{start:>4}-{start + step - 1:<3} ms {n:>6} {'#' * round(width * n / peak)}")
+        return lines
+
+    def reset(self):
+        self.buckets.clear()
+        self.count = 0
+
+
+class InputQueue:
+
+    def __init__(self, subframe=True):
+        # subframe=False restores the old behaviour: input is polled once per
+        # frame and every press of a frame goes to its first physics step
+        self.subframe = subframe
+        self.flaps = collections.deque()
+        self.events = []
+        self.latency = LatencyHistogram()
+        self.measure = False  # Record latency; only meaningful for presses that carry a timestamp
+
+    def poll(self):
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == KEYDOWN and event.key in FLAP_KEYS:
+                self.flaps.append(getattr(event, 'timestamp', now))
+            else:
+                self.events.append(event)
+
+    def takeEvents(self):
+        events, self.events = self.events, []
+        return events
+
+    def clear(self):
+        self.flaps.clear()
+        self.events = []
+
+    def pendingAfter(self, step_time):
+        return bool(self.flaps) and self.flaps[-1] > step_time
+
+    def takeFlap(self, step_time):
+        # Earliest press made up to step_time, or None. Later presses in the
+        # same step are dropped: they could not change the velocity again.
+        if not self.flaps or (self.subframe and self.flaps[0] > step_time):
+            return None
+        pressed = self.flaps.popleft()
+        while self.flaps and (not self.subframe or self.flaps[0] <= step_time):
+            self.flaps.popleft()
+        return pressed
+
+    def flapApplied(self, pressed):
+        if self.measure:
+            self.latency.record(time.perf_counter() - pressed)
+
+    def waitUntil(self, deadline, flap_due=None):
+        # Sleep until deadline (the next frame) while polling input. Returns
+        # early if a flap is waiting and flap_due (when a step can next be
+        # pulled forward for it) has come, so it is not held to the next frame.
+        if not self.subframe:
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            return
+        while True:
+            self.poll()
+            now = time.perf_counter()
+            if now >= deadline or (self.flaps and flap_due is not None and now >= flap_due):
+                return
+            time.sleep(min(deadline - now, 0.001))
@@ -3,6 +3,7 @@ import sys
 import os
 import pygame
 from pygame.locals import *
+from audio import AudioManager
 
 # Initialize pygame
 pygame.init()
@@ -21,6 +22,7 @@ FPSCLOCK = pygame.time.Clock()
 # Game Assets
 GAME_SPRITES = {}
 GAME_SOUNDS = {}
+AUDIO = AudioManager(GAME_SOUNDS)
 PLAYER = 'gallery/sprites/redbird-upflap.png'
 BACKGROUND = 'gallery/sprites/background-day.png'
 PIPE = 'gallery/sprites/pipe-green.png'
@@ -51,7 +53,7 @@ def save_high_score(score):
         new_high_score_achieved = True
         with open(HIGH_SCORE_FILE, 'w') as f:
             f.write(str(score))
-        GAME_SOUNDS['new_high_score'].play()
+        AUDIO.play('new_high_score')
 
 def welcomeScreen():
     playerx = int(SCREENWIDTH / 5)
@@ -124,7 +126,7 @@ def mainGame():
                 if playery > 0:
                     bird_velocity_y = flap_velocity
                     bird_flapped = True
-                    GAME_SOUNDS['wing'].play()
+                    AUDIO.play('wing')
 
         if bird_velocity_y < max_velocity_y and not bird_flapped:
             bird_velocity_y += gravity
@@ -138,12 +140,12 @@ def mainGame():
         for uPipe, lPipe in zip(upperPipes, lowerPipes):
             if (playerx + GAME_SPRITES['player'].get_width() > uPipe['x']) and (playerx < uPipe['x'] + GAME_SPRITES['pipe'][0].get_width()):
                 if playery < uPipe['y'] + GAME_SPRITES['pipe'][0].get_height() or playery + GAME_SPRITES['player'].get_height() > lPipe['y']:
-                    GAME_SOUNDS['hit'].play()
+                    AUDIO.play('hit')
                     save_high_score(score)
                     return
 
         if playery > GROUNDY - 25:
-            GAME_SOUNDS['die'].play()
+            AUDIO.play('die')
             save_high_score(score)
             return
 
@@ -169,11 +171,12 @@ def mainGame():
             pipeMidPos = pipe['x'] + GAME_SPRITES['pipe'][0].get_width() / 2
             if pipeMidPos <= playerMidPos < pipeMidPos + 4:
                 score += 1
-                GAME_SOUNDS['point'].play()
+                AUDIO.play('point')
 
                 if score > high_score and not new_high_score_shown:
                     high_score_flash_counter = FPS * 2  # 2 seconds
                     new_high_score_shown = True
+                    AUDIO.play('new_high_score')
 
         # Draw all elements
         SCREEN.blit(GAME_SPRITES['background'], (0, 0))
@@ -198,7 +201,6 @@ def mainGame():
             text_surface = FONT.render('New High Score!', True, (255, 0, 0))
             SCREEN.blit(text_surface, ((SCREENWIDTH - text_surface.get_width()) / 2, SCREENHEIGHT * 0.2))
             high_score_flash_counter -= 1
-            GAME_SOUNDS['new_high_score'].play()
 
         pygame.display.update()
         FPSCLOCK.tick(FPS)
@@ -235,12 +237,14 @@ if __name__ == "__main__":
     GAME_SPRITES['background'] = pygame.image.load(BACKGROUND).convert()
     GAME_SPRITES['player'] = pygame.image.load(PLAYER).convert_alpha()
 
-    GAME_SOUNDS['die'] = pygame.mixer.Sound('gallery/audio/die.wav')
-    GAME_SOUNDS['hit'] = pygame.mixer.Sound('gallery/audio/hit.wav')
-    GAME_SOUNDS['point'] = pygame.mixer.Sound('gallery/audio/point.wav')
-    GAME_SOUNDS['swoosh'] = pygame.mixer.Sound('gallery/audio/swoosh.wav')
-    GAME_SOUNDS['wing'] = pygame.mixer.Sound('gallery/audio/wing.wav')
-    GAME_SOUNDS['new_high_score'] = pygame.mixer.Sound('gallery/audio/celebration.wav')
+    AUDIO.load({
+        'die': lambda: pygame.mixer.Sound('gallery/audio/die.wav'),
+        'hit': lambda: pygame.mixer.Sound('gallery/audio/hit.wav'),
+        'point': lambda: pygame.mixer.Sound('gallery/audio/point.wav'),
+        'swoosh': lambda: pygame.mixer.Sound('gallery/audio/swoosh.wav'),
+        'wing': lambda: pygame.mixer.Sound('gallery/audio/wing.wav'),
+        'new_high_score': lambda: pygame.mixer.Sound('gallery/audio/celebration.wav'),
+    })
 
     while True:
         welcomeScreen()
@@ -1,269 +1,487 @@
+import argparse
+import atexit
 import random
 import sys
 import os
+import time
 import pygame
 from pygame.locals import *
+from config import FPS, REFRESH_RATE, ATTRACT_DELAY, PLAYER, BACKGROUND, PIPE, SOUNDS, HIGH_SCORE_FILE
+from engine import SCREENWIDTH, SCREENHEIGHT, GROUNDY, DIFFICULTY_SETTINGS, World
+from render import DirtyRenderer, SurfaceCache
+from timestep import FixedTimestep
+from inputs import InputQueue
+from audio import AudioManager
+from collision import MaskCollider
+from scores import ScoreStore
+from profiler import FrameProfiler
+import assets
+import autopilot
+import capture
+import engine
+import ghosts
+import reach
+import replay
+import scenes
+
+# Importing this module has no side effects: pygame, the window, the mixer
+# and FONT are set up by init(), which the game runs at boot and
+# loadAssets() runs for tools that drive the game loops.
+
+# Global variables (FPS, REFRESH_RATE, asset paths... come from config.py)
+SCREEN = None  # The window surface, from init()
+FPSCLOCK = pygame.time.Clock()
 
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()
+# Only push changed rectangles to the display (see --full-redraw); init() gives it SCREEN
+RENDERER = DirtyRenderer(None)
 
-# Global variables
-FPS = 32
-SCREENWIDTH = 289
-SCREENHEIGHT = 511
-SCREEN = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
-GROUNDY = int(SCREENHEIGHT * 0.8)
-FPSCLOCK = pygame.time.Clock()
+# Physics runs at FPS steps per second whatever the refresh rate
+TIMESTEP = FixedTimestep(FPS)
+
+# Timestamped flap presses, applied at the physics step they belong to
+INPUT = InputQueue()
+
+# Rendered text and score surfaces, reused until the text changes
+TEXT_CACHE = SurfaceCache()
+
+# Per-phase frame times; F3 shows them, --profile DIR saves them at exit
+PROFILER = FrameProfiler()
+PROFILER.addCounters('timestep', TIMESTEP.stats)
+
+# Pixel-exact, swept bird/pipe collision; masks are built when sprites load
+COLLIDER = MaskCollider()
 
 # Game Assets
 GAME_SPRITES = {}
 GAME_SOUNDS = {}
-PLAYER = 'gallery/sprites/redbird-upflap.png'
-BACKGROUND = 'gallery/sprites/background-day.png'
-PIPE = 'gallery/sprites/pipe-green.png'
-
-# File to store high score
-HIGH_SCORE_FILE = "high_score.txt"
-FONT = pygame.font.SysFont('Arial', 30)
-
-# Difficulty levels
-DIFFICULTY_SETTINGS = {
-    'Easy': {'pipe_gap': 160, 'pipe_speed': 3},
-    'Medium': {'pipe_gap': 140, 'pipe_speed': 4},
-    'Hard': {'pipe_gap': 120, 'pipe_speed': 5},
-}
+# Loads GAME_SOUNDS in the background and plays them on a managed channel pool
+AUDIO = AudioManager(GAME_SOUNDS)
+PROFILER.addCounters('audio', AUDIO.stats)
+
 difficulty = 'Medium'  # Default
 
+# High scores per difficulty (high_scores-<difficulty>.json), read once and
+# saved in the background; the old single high score file, from before
+# there were difficulties, seeds the default difficulty's board
+SCORES = ScoreStore('.', legacy_file=HIGH_SCORE_FILE, legacy_difficulty=difficulty)
+# Directory to save a replay of every finished game in (see --record)
+RECORD_DIR = None
+# Deal only gaps the bird can be shown to get through (see reach.py, --solvable)
+SOLVABLE_PIPES = False
+# capture.FrameCapture recording gameplay frames off-thread (see --capture, --clips)
+CAPTURE = None
+# Ghost track raced in every game, each finished game joining it (see ghosts.py, --race)
+RACE_FILE = None
+FONT = None  # From init()
+
 new_high_score_achieved = False
 new_high_score_counter = 0
 
+def init():
+    # Starts pygame and opens the window; later calls do nothing
+    global SCREEN, FONT
+    if SCREEN is not None:
+        return
+    pygame.init()
+    pygame.mixer.init()
+    SCREEN = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
+    RENDERER.screen = SCREEN
+    FONT = pygame.font.SysFont('Arial', 30)
+
 def get_high_score():
-    if not os.path.exists(HIGH_SCORE_FILE):
-        return 0
-    with open(HIGH_SCORE_FILE, 'r') as f:
-        try:
-            return int(f.read())
-        except ValueError:
-            return 0
+    return SCORES.best(difficulty)
 
 def save_high_score(score):
     global new_high_score_achieved, new_high_score_counter
     high_score = get_high_score()
+    SCORES.add(difficulty, score)
     if score > high_score:
         new_high_score_achieved = True
         new_high_score_counter = 60  # Show message for 2 seconds (60 frames)
-        with open(HIGH_SCORE_FILE, 'w') as f:
-            f.write(str(score))
         # Play celebration sound
-        if 'new_high_score' in GAME_SOUNDS:
-            GAME_SOUNDS['new_high_score'].play()
-
-def chooseDifficulty():
-    global difficulty
-    options = list(DIFFICULTY_SETTINGS.keys())
-    selected = 0
-
-    while True:
-        SCREEN.fill((0, 0, 0))
-        title = FONT.render("Choose Difficulty", True, (255, 255, 255))
-        SCREEN.blit(title, ((SCREENWIDTH - title.get_width()) // 2, 50))
-
-        for i, opt in enumerate(options):
-            color = (255, 255, 0) if i == selected else (200, 200, 200)
-            text = FONT.render(opt, True, color)
-            SCREEN.blit(text, ((SCREENWIDTH - text.get_width()) // 2, 150 + i * 40))
-
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == KEYDOWN:
-                if event.key == K_UP:
-                    selected = (selected - 1) % len(options)
-                elif event.key == K_DOWN:
-                    selected = (selected + 1) % len(options)
-                elif event.key == K_RETURN:
-                    difficulty = options[selected]
-                    return
-        FPSCLOCK.tick(FPS)
+        AUDIO.play('new_high_score')
+        if CAPTURE:
+            CAPTURE.clip(f"highscore-{time.strftime('%Y%m%d-%H%M%S')}-{difficulty}-{score}")
+
+def newScene():
+    return pygame.Surface(SCREEN.get_size()).convert()
+
+def drawOverlay():
+    overlay = PROFILER.overlay()
+    if overlay is not None:
+        RENDERER.blit(overlay, (0, 0))
+
+def drawGhosts(track, world, alpha):
+    # Every ghost still flying, in one blits call
+    ys = track.positions(world.frame, alpha)
+    if len(ys):
+        sprites = GAME_SPRITES['ghosts']
+        width, height = sprites[0].get_size()
+        top = int(ys.min())
+        RENDERER.blits(ghosts.blitSequence(sprites, world.playerx, ys),
+                       (world.playerx, top, width, int(ys.max()) - top + height))
+
+def newWorld():
+    return World(difficulty,
+                 player_size=GAME_SPRITES['player'].get_size(),
+                 pipe_size=GAME_SPRITES['pipe'][0].get_size(),
+                 base_height=GAME_SPRITES['base'].get_height(),
+                 collider=COLLIDER,
+                 pipe_generator=reach.solvablePipes(difficulty) if SOLVABLE_PIPES else None)
+
+# The screens, run by SCENES in one loop (see scenes.py). The menus are
+# static: they sleep until a key, the attract timer or the F3 overlay
+# needs them, and only then draw.
+
+class StaticScene(scenes.Scene):
+    static = True
+
+    def handleEvent(self, event):
+        if RENDERER.handleEvent(event):
+            self.dirty = True
+
+    def present(self):
+        RENDERER.present()
+
+    def wait(self):
+        # Polling instead of sleeping (SCENES.block off): keep the old pace
+        if not self.manager.block:
+            FPSCLOCK.tick(FPS)
+
+
+class BootScene(scenes.Scene):
+    name = 'boot'
+
+    def enter(self):
+        init()
+        pygame.display.set_caption('Flappy Bird')
+        loadAssets()
+        self.manager.switch('difficulty')
+
+
+class DifficultyScene(StaticScene):
+    name = 'difficulty'
+
+    def enter(self):
+        self.options = list(DIFFICULTY_SETTINGS.keys())
+        self.selected = 0
+
+        scene = newScene()
+        title = TEXT_CACHE.text(FONT, "Choose Difficulty", (255, 255, 255))
+        scene.blit(title, ((SCREENWIDTH - title.get_width()) // 2, 50))
+        RENDERER.setScene(scene)
+
+    def handleEvent(self, event):
+        global difficulty
+        super().handleEvent(event)
+        if event.type == KEYDOWN:
+            if event.key == K_UP:
+                self.selected = (self.selected - 1) % len(self.options)
+                self.dirty = True
+            elif event.key == K_DOWN:
+                self.selected = (self.selected + 1) % len(self.options)
+                self.dirty = True
+            elif event.key == K_RETURN:
+                difficulty = self.options[self.selected]
+                self.manager.switch('welcome')
+
+    def draw(self):
+        RENDERER.begin()
+        for i, opt in enumerate(self.options):
+            color = (255, 255, 0) if i == self.selected else (200, 200, 200)
+            text = TEXT_CACHE.text(FONT, opt, color)
+            RENDERER.blit(text, ((SCREENWIDTH - text.get_width()) // 2, 150 + i * 40))
+        drawOverlay()
+
+
+class MenuScene(StaticScene):
+    name = 'welcome'
+
+    def enter(self):
+        messagex = int((SCREENWIDTH - GAME_SPRITES['message'].get_width()) / 2)
+        messagey = int(SCREENHEIGHT * 0.13)
+        basex = 0
+        high_score = get_high_score()
+
+        # Nothing on this screen moves, so all of it goes into the scene
+        scene = newScene()
+        scene.blit(GAME_SPRITES['background'], (0, 0))
+        scene.blit(GAME_SPRITES['message'], (messagex, messagey))
+        scene.blit(GAME_SPRITES['base'], (basex, GROUNDY))
 
-def welcomeScreen():
-    playerx = int(SCREENWIDTH / 5)
-    playery = int(SCREENHEIGHT / 2)
-    messagex = int((SCREENWIDTH - GAME_SPRITES['message'].get_width()) / 2)
-    messagey = int(SCREENHEIGHT * 0.13)
-    basex = 0
-    high_score = get_high_score()
+        # Show difficulty
+        diff_text = TEXT_CACHE.text(FONT, f'Difficulty: {difficulty}', (255, 255, 255))
+        scene.blit(diff_text, (10, SCREENHEIGHT - 30))
 
-    while True:
-        for event in pygame.event.get():
-            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
-                pygame.quit()
-                sys.exit()
-            elif event.type == KEYDOWN and (event.key == K_SPACE or event.key == K_UP):
+        # High Score
+        high_digits = TEXT_CACHE.number(high_score, GAME_SPRITES['numbers'])
+        scene.blit(high_digits, ((SCREENWIDTH - high_digits.get_width()) / 2, SCREENHEIGHT * 0.03))
+        RENDERER.setScene(scene)
+        self.idle_since = time.perf_counter()
+
+    def timeout(self):
+        # Sleep until attract mode is due
+        if not ATTRACT_DELAY:
+            return None
+        return max(0.0, self.idle_since + ATTRACT_DELAY - time.perf_counter())
+
+    def handleEvent(self, event):
+        super().handleEvent(event)
+        if event.type == KEYDOWN and event.key == K_ESCAPE:
+            pygame.quit()
+            sys.exit()
+        elif event.type == KEYDOWN and (event.key == K_SPACE or event.key == K_UP):
+            self.manager.switch('game')
+        elif event.type == KEYDOWN:
+            self.idle_since = time.perf_counter()
+
+    def update(self):
+        if ATTRACT_DELAY and time.perf_counter() - self.idle_since > ATTRACT_DELAY:
+            # Attract mode: a demo game until it crashes or a key is pressed
+            self.manager.switch('game', pilot=autopilot.load(difficulty), attract=True)
+
+    def draw(self):
+        RENDERER.begin()
+        drawOverlay()
+
+
+class GameplayScene(scenes.Scene):
+    name = 'game'
+
+    def enter(self, pilot=None, attract=False):
+        # pilot: a policy such as autopilot.Autopilot playing instead of the
+        # keyboard. An attract game ends on any key and is neither scored nor
+        # recorded.
+        global new_high_score_achieved, difficulty
+        new_high_score_achieved = False
+        self.pilot = pilot
+        self.attract = attract
+
+        # A race is played on the track's difficulty and pipes
+        self.ghosts = loadGhosts() if RACE_FILE and not attract else None
+        if self.ghosts is not None:
+            difficulty = self.ghosts.difficulty
+            if 'ghosts' not in GAME_SPRITES:
+                GAME_SPRITES['ghosts'] = ghosts.ghostSprites(GAME_SPRITES['player'])
+
+        self.world = newWorld()
+        if self.ghosts is not None:
+            self.ghosts.race(self.world)
+        PROFILER.instrument(self.world)
+        if CAPTURE and not attract:
+            CAPTURE.begin(SCREEN, f"{time.strftime('%Y%m%d-%H%M%S')}-{difficulty}-{self.world.seed:x}")
+
+        # Background and ground are static; the ground is drawn over the pipes
+        scene = newScene()
+        scene.blit(GAME_SPRITES['background'], (0, 0))
+        ground = scene.blit(GAME_SPRITES['base'], (0, GROUNDY))
+        RENDERER.setScene(scene, foreground=ground)
+
+        self.prev_playery = self.world.playery
+        self.flaps = []  # Frames with a flap press, for the replay
+        self.frame_budget = 1 / REFRESH_RATE if REFRESH_RATE else 0
+        self.pulled = False
+        TIMESTEP.reset()
+        INPUT.clear()
+        self.last_frame = time.perf_counter()
+
+    def exit(self):
+        if self.ghosts is not None:
+            self.ghosts.close()
+            self.ghosts = None
+
+    def events(self, timeout=None):
+        INPUT.poll()
+        return INPUT.takeEvents()
+
+    def handleEvent(self, event):
+        if RENDERER.handleEvent(event):
+            return
+        if self.attract and event.type == KEYDOWN:
+            self.manager.switch('gameover', world=self.world, attract=True)
+        elif event.type == KEYDOWN and event.key == K_ESCAPE:
+            pygame.quit()
+            sys.exit()
+
+    def update(self):
+        global new_high_score_counter
+        world = self.world
+        pilot = self.pilot
+        if pilot is not None and INPUT.flaps:
+            # INPUT.poll() queues flap keys rather than passing them to
+            # handleEvent: they are key presses here, not flaps
+            INPUT.flaps.clear()
+            if self.attract:
+                self.manager.switch('gameover', world=world, attract=True)
                 return
 
-        SCREEN.blit(GAME_SPRITES['background'], (0, 0))
-        SCREEN.blit(GAME_SPRITES['message'], (messagex, messagey))
-        SCREEN.blit(GAME_SPRITES['base'], (basex, GROUNDY))
+        # Run as many fixed physics steps as the elapsed time calls for; each
+        # step takes the flaps pressed up to its own point in time
+        now = time.perf_counter()
+        steps = TIMESTEP.advance(now - self.last_frame, self.frame_budget)
+        self.last_frame = now
+        step_times = [now - TIMESTEP.accumulator - (steps - 1 - i) * TIMESTEP.dt for i in range(steps)]
+
+        # A flap pressed after the last due step pulls the next step forward
+        # so it takes effect now rather than up to one step later
+        self.pulled = (INPUT.subframe and INPUT.pendingAfter(step_times[-1] if step_times else float('-inf'))
+                       and TIMESTEP.pull())
+        if self.pulled:
+            step_times.append(now)
+
+        for step_time in step_times:
+            pressed = INPUT.takeFlap(step_time) if pilot is None else None
+            flap = pressed is not None if pilot is None else pilot(world)
+            self.prev_playery = world.playery
+            sounds = world.step(flap)
+            if flap:
+                self.flaps.append(world.frame)
+                if pressed is not None and 'wing' in sounds:
+                    INPUT.flapApplied(pressed)
+            for sound in sounds:
+                AUDIO.play(sound)
+
+            if world.crashed:
+                self.manager.switch('gameover', world=world, flaps=self.flaps, attract=self.attract)
+                return
 
-        # Show difficulty
-        diff_text = FONT.render(f'Difficulty: {difficulty}', True, (255, 255, 255))
-        SCREEN.blit(diff_text, (10, SCREENHEIGHT - 30))
+            if new_high_score_counter > 0:
+                new_high_score_counter -= 1
 
-        # High Score
-        high_digits = [int(x) for x in list(str(high_score))]
-        width = sum(GAME_SPRITES['numbers'][d].get_width() for d in high_digits)
-        xoffset = (SCREENWIDTH - width) / 2
-        for d in high_digits:
-            SCREEN.blit(GAME_SPRITES['numbers'][d], (xoffset, SCREENHEIGHT * 0.03))
-            xoffset += GAME_SPRITES['numbers'][d].get_width()
+        PROFILER.mark('physics')
 
-        pygame.display.update()
-        FPSCLOCK.tick(FPS)
+    def draw(self):
+        world = self.world
+        if self.pulled:
+            # Show the flap straight away and interpolate onwards from there
+            self.prev_playery = world.playery
 
-def mainGame():
-    global new_high_score_achieved, new_high_score_counter
-    new_high_score_achieved = False
-
-    settings = DIFFICULTY_SETTINGS[difficulty]
-    pipe_gap = settings['pipe_gap']
-    pipe_speed = settings['pipe_speed']
-
-    score = 0
-    playerx = int(SCREENWIDTH / 5)
-    playery = int(SCREENHEIGHT / 2)
-
-    bird_velocity_y = -9
-    max_velocity_y = 10
-    gravity = 1
-    flap_velocity = -9
-    bird_flapped = False
-
-    # Calculate proper pipe spacing based on difficulty
-    pipe_spacing = SCREENWIDTH * 0.8
-    
-    # Generate initial pipes
-    newPipe1 = getRandomPipe(pipe_gap)
-    newPipe2 = getRandomPipe(pipe_gap)
-
-    upperPipes = [
-        {'x': SCREENWIDTH + 200, 'y': newPipe1[0]['y']},
-        {'x': SCREENWIDTH + 200 + pipe_spacing, 'y': newPipe2[0]['y']},
-    ]
-    lowerPipes = [
-        {'x': SCREENWIDTH + 200, 'y': newPipe1[1]['y']},
-        {'x': SCREENWIDTH + 200 + pipe_spacing, 'y': newPipe2[1]['y']},
-    ]
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
-                pygame.quit()
-                sys.exit()
-            elif event.type == KEYDOWN and (event.key == K_SPACE or event.key == K_UP):
-                if playery > 0:
-                    bird_velocity_y = flap_velocity
-                    bird_flapped = True
-                    GAME_SOUNDS['wing'].play()
-
-        if bird_velocity_y < max_velocity_y and not bird_flapped:
-            bird_velocity_y += gravity
-
-        if bird_flapped:
-            bird_flapped = False
-
-        playery += min(bird_velocity_y, GROUNDY - playery - GAME_SPRITES['player'].get_height())
-
-        # Collision detection
-        for uPipe, lPipe in zip(upperPipes, lowerPipes):
-            if (playerx + GAME_SPRITES['player'].get_width() > uPipe['x']) and (playerx < uPipe['x'] + GAME_SPRITES['pipe'][0].get_width()):
-                if playery < uPipe['y'] + GAME_SPRITES['pipe'][0].get_height() or playery + GAME_SPRITES['player'].get_height() > lPipe['y']:
-                    GAME_SOUNDS['hit'].play()
-                    save_high_score(score)
-                    return
-
-        if playery > GROUNDY - 25:
-            GAME_SOUNDS['die'].play()
-            save_high_score(score)
-            return
+        # Draw between the last two steps; pipes always move pipe_speed per step
+        alpha = TIMESTEP.alpha
+        playery = self.prev_playery + (world.playery - self.prev_playery) * alpha
+        pipe_offset = world.pipe_speed * (1 - alpha)
 
-        # Move pipes
-        for upperPipe, lowerPipe in zip(upperPipes, lowerPipes):
-            upperPipe['x'] -= pipe_speed
-            lowerPipe['x'] -= pipe_speed
-
-        # Add new pipe when the first pipe is about to leave the screen
-        if upperPipes[0]['x'] < -GAME_SPRITES['pipe'][0].get_width():
-            upperPipes.pop(0)
-            lowerPipes.pop(0)
-            newpipe = getRandomPipe(pipe_gap)
-            upperPipes.append({'x': upperPipes[-1]['x'] + pipe_spacing, 'y': newpipe[0]['y']})
-            lowerPipes.append({'x': lowerPipes[-1]['x'] + pipe_spacing, 'y': newpipe[1]['y']})
-
-        # Score
-        playerMidPos = playerx + GAME_SPRITES['player'].get_width() / 2
-        for pipe in upperPipes:
-            pipeMidPos = pipe['x'] + GAME_SPRITES['pipe'][0].get_width() / 2
-            if pipeMidPos <= playerMidPos < pipeMidPos + pipe_speed:
-                score += 1
-                GAME_SOUNDS['point'].play()
-
-        # Draw
-        SCREEN.blit(GAME_SPRITES['background'], (0, 0))
-        for upperPipe, lowerPipe in zip(upperPipes, lowerPipes):
-            SCREEN.blit(GAME_SPRITES['pipe'][0], (upperPipe['x'], upperPipe['y']))
-            SCREEN.blit(GAME_SPRITES['pipe'][1], (lowerPipe['x'], lowerPipe['y']))
-        SCREEN.blit(GAME_SPRITES['base'], (0, GROUNDY))
-        SCREEN.blit(GAME_SPRITES['player'], (playerx, playery))
+        RENDERER.begin()
+        for x, gap_top, gap_bottom in world.pipes:
+            RENDERER.blit(GAME_SPRITES['pipe'][0], (x + pipe_offset, gap_top - world.pipe_height), behind=True)
+            RENDERER.blit(GAME_SPRITES['pipe'][1], (x + pipe_offset, gap_bottom), behind=True)
+        if self.ghosts is not None:
+            PROFILER.mark('draw')
+            drawGhosts(self.ghosts, world, alpha)
+            PROFILER.mark('ghosts')
+        RENDERER.blit(GAME_SPRITES['player'], (world.playerx, playery))
 
         # Score display
-        myDigits = [int(x) for x in list(str(score))]
-        width = sum(GAME_SPRITES['numbers'][d].get_width() for d in myDigits)
-        Xoffset = (SCREENWIDTH - width) / 2
-        for digit in myDigits:
-            SCREEN.blit(GAME_SPRITES['numbers'][digit], (Xoffset, SCREENHEIGHT * 0.12))
-            Xoffset += GAME_SPRITES['numbers'][digit].get_width()
+        myDigits = TEXT_CACHE.number(world.score, GAME_SPRITES['numbers'])
+        RENDERER.blit(myDigits, ((SCREENWIDTH - myDigits.get_width()) / 2, SCREENHEIGHT * 0.12))
 
         # New high score message
         if new_high_score_achieved and new_high_score_counter > 0:
-            text_surface = FONT.render('New High Score!', True, (255, 0, 0))
-            SCREEN.blit(text_surface, ((SCREENWIDTH - text_surface.get_width()) / 2, SCREENHEIGHT * 0.2))
-            new_high_score_counter -= 1
+            text_surface = TEXT_CACHE.text(FONT, 'New High Score!', (255, 0, 0))
+            RENDERER.blit(text_surface, ((SCREENWIDTH - text_surface.get_width()) / 2, SCREENHEIGHT * 0.2))
+        if self.attract:
+            text_surface = TEXT_CACHE.text(FONT, 'Demo', (255, 255, 255))
+            RENDERER.blit(text_surface, ((SCREENWIDTH - text_surface.get_width()) / 2, SCREENHEIGHT * 0.2))
+        drawOverlay()
+
+    def present(self):
+        RENDERER.present()
+        if CAPTURE:
+            PROFILER.mark('present')
+            CAPTURE.grab(SCREEN)
+            PROFILER.mark('capture')
+
+    def wait(self):
+        # Keep polling input until the next frame, or until a new flap can run
+        INPUT.waitUntil(self.last_frame + self.frame_budget, self.last_frame + max(-TIMESTEP.accumulator, 0))
+
+
+class GameOverScene(scenes.Scene):
+    name = 'gameover'
+
+    def enter(self, world, flaps=(), attract=False):
+        self.world = world
+        if CAPTURE:
+            CAPTURE.end()
+        if not attract:
+            game = replay.Replay.fromWorld(world, flaps)
+            if RECORD_DIR:
+                saveReplay(game)
+            if RACE_FILE:
+                addGhost(game, world.collider)
+            save_high_score(world.score)
+        self.manager.switch('welcome')
+
+
+SCENES = scenes.SceneManager(PROFILER)
+SCENES.add(BootScene(), DifficultyScene(), MenuScene(), GameplayScene(), GameOverScene())
+
+# The old entry points, each running SCENES until its screen is done
 
-        pygame.display.update()
-        FPSCLOCK.tick(FPS)
+def chooseDifficulty():
+    SCENES.run('difficulty', stop=lambda name, kwargs: name == 'welcome')
+
+def welcomeScreen():
+    # Returns when a real game is about to start; attract demos run inside
+    SCENES.run('welcome', stop=lambda name, kwargs: name == 'game' and not kwargs.get('attract'))
+
+def mainGame(pilot=None, attract=False):
+    # Plays one game through to game over; returns the finished World
+    SCENES.run('game', stop=lambda name, kwargs: name == 'welcome', pilot=pilot, attract=attract)
+    return SCENES.scenes['gameover'].world
+
+def saveReplay(game):
+    try:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        game.save(replay.recordPath(RECORD_DIR, game))
+    except OSError as e:
+        print(f"Error saving replay: {e}")
+
+def loadGhosts():
+    # The race track, or None before its first game
+    try:
+        return ghosts.loadTrack(RACE_FILE)
+    except (OSError, replay.ReplayError) as e:
+        print(f"Error loading ghosts: {e}")
+        return None
+
+def addGhost(game, collider):
+    try:
+        ghosts.addRun(RACE_FILE, game, collider)
+    except (OSError, replay.ReplayError) as e:
+        print(f"Error saving ghost: {e}")
 
 def getRandomPipe(pipe_gap):
-    pipeHeight = GAME_SPRITES['pipe'][0].get_height()
-    base_height = GAME_SPRITES['base'].get_height()
-    
-    # Calculate minimum and maximum y positions for the gap center
-    min_y = pipe_gap // 2 + 50  # Added buffer to prevent pipes from touching top/bottom
-    max_y = SCREENHEIGHT - base_height - pipe_gap // 2 - 50  # Added buffer
-    
-    # Ensure valid range
-    if min_y > max_y:
-        min_y = max_y
-    
-    # Randomly select gap center
-    center_y = random.randint(min_y, max_y)
-    
-    # Calculate pipe positions
-    upper_pipe_y = center_y - pipe_gap // 2 - pipeHeight
-    lower_pipe_y = center_y + pipe_gap // 2
-    
-    pipeX = SCREENWIDTH + 10
-    pipe = [
-        {'x': pipeX, 'y': upper_pipe_y},  # Upper pipe
-        {'x': pipeX, 'y': lower_pipe_y}   # Lower pipe
-    ]
-    return pipe
+    # The loaded sprites' sizes, or the engine's defaults before loadAssets()
+    pipe_height = GAME_SPRITES['pipe'][0].get_height() if 'pipe' in GAME_SPRITES else engine.PIPE_HEIGHT
+    base_height = GAME_SPRITES['base'].get_height() if 'base' in GAME_SPRITES else engine.BASE_HEIGHT
+    return engine.getRandomPipe(pipe_gap, random, pipe_height, base_height)
+
+def loadAssets():
+    # Use the prebuilt atlas and decoded sounds when they are up to date
+    init()
+    cache = assets.loadCache()
+    if cache is None:
+        loadAssetFiles()
+        return
+    sprite = cache.sprite
+    GAME_SPRITES['numbers'] = tuple(sprite(str(i)) for i in range(10))
+    GAME_SPRITES['message'] = sprite('message')
+    GAME_SPRITES['base'] = sprite('base')
+    GAME_SPRITES['pipe'] = (
+        sprite(assets.spriteName(PIPE) + assets.ROTATED),
+        sprite(assets.spriteName(PIPE))
+    )
+    GAME_SPRITES['background'] = sprite(assets.spriteName(BACKGROUND)).convert()
+    GAME_SPRITES['player'] = sprite(assets.spriteName(PLAYER))
+    COLLIDER.setSprites(GAME_SPRITES['player'], *GAME_SPRITES['pipe'])
 
-if __name__ == "__main__":
-    pygame.display.set_caption('Flappy Bird')
+    # Gameplay can start while sounds load; unloaded ones are skipped
+    AUDIO.load({name: (lambda path=path: cache.sound(assets.spriteName(path)))
+                for name, path in SOUNDS.items()})
+
+def loadAssetFiles():
+    init()
     GAME_SPRITES['numbers'] = tuple(pygame.image.load(f'gallery/sprites/{i}.png').convert_alpha() for i in range(10))
     GAME_SPRITES['message'] = pygame.image.load('gallery/sprites/message.png').convert_alpha()
     GAME_SPRITES['base'] = pygame.image.load('gallery/sprites/base.png').convert_alpha()
@@ -273,15 +491,41 @@ if __name__ == "__main__":
     )
     GAME_SPRITES['background'] = pygame.image.load(BACKGROUND).convert()
     GAME_SPRITES['player'] = pygame.image.load(PLAYER).convert_alpha()
+    COLLIDER.setSprites(GAME_SPRITES['player'], *GAME_SPRITES['pipe'])
+
+    AUDIO.load({name: (lambda path=path: pygame.mixer.Sound(path))
+                for name, path in SOUNDS.items()})
 
-    GAME_SOUNDS['die'] = pygame.mixer.Sound('gallery/audio/die.wav')
-    GAME_SOUNDS['hit'] = pygame.mixer.Sound('gallery/audio/hit.wav')
-    GAME_SOUNDS['point'] = pygame.mixer.Sound('gallery/audio/point.wav')
-    GAME_SOUNDS['swoosh'] = pygame.mixer.Sound('gallery/audio/swoosh.wav')
-    GAME_SOUNDS['wing'] = pygame.mixer.Sound('gallery/audio/wing.wav')
-    GAME_SOUNDS['new_high_score'] = pygame.mixer.Sound('gallery/audio/celebration.wav')
-
-    chooseDifficulty()
-    while True:
-        welcomeScreen()
-        mainGame()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Flappy Bird')
+    parser.add_argument('--full-redraw', action='store_true', help='update the whole window every frame')
+    parser.add_argument('--refresh', type=int, default=REFRESH_RATE, help='gameplay frames per second')
+    parser.add_argument('--frame-input', action='store_true', help='poll input once per frame (old behaviour)')
+    parser.add_argument('--record', metavar='DIR', help='save a replay of every game in DIR')
+    parser.add_argument('--profile', metavar='DIR', help='write per-frame phase timings to DIR at exit')
+    parser.add_argument('--solvable', action='store_true', help='only deal pipe sequences that can be passed')
+    parser.add_argument('--attract', type=float, default=ATTRACT_DELAY, metavar='SECONDS',
+                        help='idle time before the welcome screen plays a demo game (0: never)')
+    parser.add_argument('--capture', metavar='DIR', help='record every game as a frame stream in DIR')
+    parser.add_argument('--clips', metavar='DIR', help='save the last seconds of each new high score game in DIR')
+    parser.add_argument('--race', metavar='FILE', help='race the ghosts of the track in FILE and add each game to it')
+    args = parser.parse_args()
+    ATTRACT_DELAY = args.attract
+    if args.solvable:
+        SOLVABLE_PIPES = True
+        for name in DIFFICULTY_SETTINGS:
+            reach.loadTable(name)  # Built and cached on the first run
+    if args.profile:
+        atexit.register(PROFILER.export, args.profile)
+    RECORD_DIR = args.record
+    RACE_FILE = args.race
+    if args.capture or args.clips:
+        CAPTURE = capture.FrameCapture(args.capture or args.clips,
+                                       clip_seconds=None if args.capture else capture.CLIP_SECONDS)
+        atexit.register(CAPTURE.report)
+        atexit.register(CAPTURE.close)
+    RENDERER.enabled = not args.full_redraw
+    INPUT.subframe = not args.frame_input
+    REFRESH_RATE = args.refresh
+
+    SCENES.run('boot')
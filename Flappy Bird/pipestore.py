@@ -0,0 +1,85 @@
+# Pipe storage shared by engine.World and the renderer.
+#
+# A fixed-capacity ring buffer of pipe pairs held in three preallocated
+# columns: x (left edge), gap_top (bottom edge of the upper pipe) and
+# gap_bottom (top edge of the lower pipe). Spawning writes one slot, culling
+# advances the head, and nothing is ever shifted or reallocated. 'order' is
+# the tuple of live slot indices front to back, so loops can index the
+# columns directly; every (head, count) has its tuple made once per
+# capacity, so keeping it up to date is one lookup. The columns are plain
+# lists rather than array('d'): reading an array element boxes a new float
+# every time, which made the per-frame loops slower than the old dicts.
+#
+# move() is a loop over the live pipes, not a bulk update of a column: with
+# two or three pipes on screen the loop takes about 0.3 us, rewriting the
+# whole column with a list comprehension twice that and a NumPy in-place
+# subtract about six times that, in call overhead alone.
+
+
+ORDERS = {}  # capacity -> orders[head][count], see ringOrders()
+
+
+def ringOrders(capacity):
+    # The slot indices of count pipes starting at head, for every head and count
+    if capacity not in ORDERS:
+        ORDERS[capacity] = [[tuple((head + k) % capacity for k in range(count)) for count in range(capacity + 1)]
+                            for head in range(capacity)]
+    return ORDERS[capacity]
+
+
+class PipeStore:
+
+    def __init__(self, capacity=4):
+        self.capacity = capacity
+        self.x = [0.0] * capacity
+        self.gap_top = [0.0] * capacity
+        self.gap_bottom = [0.0] * capacity
+        self.orders = ringOrders(capacity)
+        self.head = 0
+        self.count = 0
+        self.order = ()
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.order = ()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # (x, gap_top, gap_bottom) front to back
+        x, top, bottom = self.x, self.gap_top, self.gap_bottom
+        return ((x[i], top[i], bottom[i]) for i in self.order)
+
+    def push(self, x, gap_top, gap_bottom):
+        if self.count == self.capacity:
+            raise IndexError('pipe store is full')
+        i = (self.head + self.count) % self.capacity
+        self.x[i] = x
+        self.gap_top[i] = gap_top
+        self.gap_bottom[i] = gap_bottom
+        self.count += 1
+        self.order = self.orders[self.head][self.count]
+
+    def move(self, dx):
+        x = self.x
+        for i in self.order:
+            x[i] -= dx
+
+    def cull(self, min_x):
+        # Drop pipes from the front whose x is below min_x; returns how many
+        removed = 0
+        while self.count and self.x[self.head] < min_x:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+            removed += 1
+        if removed:
+            self.order = self.orders[self.head][self.count]
+        return removed
+
+    def first(self):
+        return self.order[0]
+
+    def last(self):
+        return self.order[-1]
@@ -0,0 +1,189 @@
+import collections
+import csv
+import json
+import os
+import time
+
+import pygame
+from pygame.locals import KEYDOWN, K_F3
+
+# Per-phase frame timing for the game loops.
+#
+# A loop calls beginFrame(scene), then mark(phase) after each phase and
+# endFrame() at the end; mark() charges the time since the previous mark to
+# that phase. Calls wrapped with timed() (collision, pipe spawning) are
+# charged to their own phase and taken out of the phase around them.
+# The last 'window' frames of every phase feed the percentiles shown on the
+# overlay (toggled with F3); every frame is kept in a trace that export()
+# writes as CSV and JSON.
+#
+# Counters registered with addCounters() (late frames and dropped steps of
+# the fixed timestep, the audio manager's drops...) are running totals. The
+# overlay shows them under the phases, and each frame's values go into the
+# trace as well, so an export shows the frames where they went up.
+
+OVERLAY_KEY = K_F3
+OVERLAY_REFRESH = 0.25  # seconds between overlay redraws
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {'p50': percentile(ordered, 50), 'p95': percentile(ordered, 95),
+            'p99': percentile(ordered, 99), 'max': ordered[-1] if ordered else 0.0,
+            'mean': sum(ordered) / len(ordered) if ordered else 0.0}
+
+
+class FrameProfiler:
+
+    def __init__(self, window=600, trace_limit=36000):
+        self.window = window
+        self.samples = {}  # scene -> {phase: deque of the last 'window' durations}
+        self.trace = collections.deque(maxlen=trace_limit)  # (scene, start, {phase: seconds})
+        self.origin = time.perf_counter()
+        self.scene = None
+        self.phases = {}
+        self.nested = 0.0
+        self.start = self.last = 0.0
+        self.show = False
+        self.font = None
+        self.overlay_surface = None
+        self.overlay_time = 0.0
+        self.counters = {}  # name -> callable returning {counter: running total}
+        self.counter_trace = collections.deque(maxlen=trace_limit)  # Counter values of the last frames in trace
+
+    def addCounters(self, name, stats):
+        # stats: e.g. FixedTimestep.stats; called once per frame, so keep it cheap
+        self.counters[name] = stats
+
+    def counterValues(self):
+        return {f'{name}.{key}': value for name, stats in self.counters.items() for key, value in stats().items()}
+
+    def beginFrame(self, scene):
+        # Starts a new frame; an unfinished one (the loop returned) is dropped
+        self.scene = scene
+        self.phases = {}
+        self.nested = 0.0
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last - self.nested
+        self.nested = 0.0
+        self.last = now
+
+    def timed(self, phase, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+                self.nested += elapsed
+        return wrapper
+
+    def instrument(self, world):
+        # Time a World's collision test and pipe spawning as phases of their own
+        world.spawnPipe = self.timed('spawn', world.spawnPipe)
+        collider = world.collider
+        if collider is not None and 'collide' not in vars(collider):
+            collider.collide = self.timed('collision', collider.collide)
+
+    def endFrame(self):
+        phases = self.phases
+        phases['frame'] = time.perf_counter() - self.start
+        samples = self.samples.get(self.scene)
+        if samples is None:
+            samples = self.samples[self.scene] = {}
+        for phase, value in phases.items():
+            if phase not in samples:
+                samples[phase] = collections.deque(maxlen=self.window)
+            samples[phase].append(value)
+        self.trace.append((self.scene, self.start - self.origin, phases))
+        if self.counters:
+            self.counter_trace.append(tuple(value for stats in self.counters.values() for value in stats().values()))
+
+    def handleEvent(self, event):
+        # True if the event was the overlay key
+        if event.type == KEYDOWN and event.key == OVERLAY_KEY:
+            self.show = not self.show
+            self.overlay_surface = None
+            return True
+        return False
+
+    def summary(self, scene):
+        # {phase: {p50, p95, p99, max, mean}} in seconds over the rolling window
+        return {phase: summarize(values) for phase, values in self.samples.get(scene, {}).items()}
+
+    def overlay(self):
+        # Surface with the current scene's phase percentiles, or None when hidden
+        if not self.show:
+            return None
+        now = time.perf_counter()
+        if self.overlay_surface is None or now - self.overlay_time >= OVERLAY_REFRESH:
+            self.overlay_time = now
+            self.overlay_surface = self.drawOverlay(self.summary(self.scene))
+        return self.overlay_surface
+
+    def drawOverlay(self, summary):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 16)
+        frame = summary.get('frame', {}).get('mean', 0)
+        lines = [f"{self.scene}  {1 / frame if frame else 0:5.1f} fps",
+                 f"{'ms':<10}{'p50':>6}{'p95':>6}{'p99':>6}{'max':>6}"]
+        for phase, stats in sorted(summary.items(), key=lambda item: (item[0] == 'frame', item[0])):
+            lines.append(f"{phase:<10}" + ''.join(f"{1000 * stats[key]:6.2f}" for key in ('p50', 'p95', 'p99', 'max')))
+        for name, stats in self.counters.items():
+            items = [f"{key} {value}" for key, value in stats().items()]
+            lines.append(name)
+            lines.extend('  ' + '  '.join(items[i:i + 2]) for i in range(0, len(items), 2))
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        height = self.font.get_linesize()
+        surface = pygame.Surface((max(line.get_width() for line in rendered) + 8, height * len(rendered) + 8),
+                                 pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for i, line in enumerate(rendered):
+            surface.blit(line, (4, 4 + i * height))
+        return surface
+
+    def export(self, directory):
+        # Write the per-frame trace as CSV and JSON (with a per-scene summary)
+        if not self.trace:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime('profile-%Y%m%d-%H%M%S'))
+        phases = sorted({phase for _, _, frame in self.trace for phase in frame}, key=lambda p: (p == 'frame', p))
+        totals = self.counterValues()
+        # The counter trace covers the last frames of the trace (counters may be added late)
+        counters = [()] * (len(self.trace) - len(self.counter_trace)) + list(self.counter_trace)
+
+        with open(base + '.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'scene', 'start_ms'] + [phase + '_ms' for phase in phases] + list(totals))
+            for i, (scene, start, frame) in enumerate(self.trace):
+                writer.writerow([i, scene, f'{1000 * start:.3f}']
+                                + [f'{1000 * frame[phase]:.4f}' if phase in frame else '' for phase in phases]
+                                + list(counters[i] or [''] * len(totals)))
+
+        by_scene = {}
+        for scene, _, frame in self.trace:
+            for phase, value in frame.items():
+                by_scene.setdefault(scene, {}).setdefault(phase, []).append(value)
+        with open(base + '.json', 'w') as f:
+            json.dump({
+                'summary_ms': {scene: {phase: {key: 1000 * value for key, value in summarize(values).items()}
+                                       for phase, values in scene_phases.items()}
+                               for scene, scene_phases in by_scene.items()},
+                'counters': totals,
+                'frames': [{'scene': scene, 'start_ms': 1000 * start,
+                            **{phase + '_ms': 1000 * value for phase, value in frame.items()},
+                            **dict(zip(totals, values))}
+                           for (scene, start, frame), values in zip(self.trace, counters)],
+            }, f)
+        return base
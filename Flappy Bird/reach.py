@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from engine import (SCREENWIDTH, SCREENHEIGHT, GROUNDY, DIFFICULTY_SETTINGS, PLAYER_WIDTH, PLAYER_HEIGHT,
+                    PIPE_WIDTH, PIPE_HEIGHT, BASE_HEIGHT, START_VELOCITY_Y, MAX_VELOCITY_Y, GRAVITY,
+                    FLAP_VELOCITY, World)
+
+# Reachability table and a pipe generator that only deals passable gaps.
+#
+# The bird's state after a step is (y, velocity). With integer physics
+# there are only a few thousand live states, and one step with or without
+# a flap maps each of them to a single next state, so a set of states is a
+# boolean vector and one step backwards is two gathers.
+#
+# Leaving a column, the bird should be in the gap and falling gently
+# (EXIT_VELOCITY). For every gap center c2 a backward pass over one pipe
+# period gives the states, on the last frame in the previous column, from
+# which some flap sequence stays alive through the open stretch and inside
+# c2's gap for every frame the bird overlaps c2's column, and leaves it in
+# such an exit state. c1 -> c2 is allowed when every exit state of c1 is
+# one of them, so by induction a bird that gets through the first gap can
+# get through all of them. The column is widened by SLACK_FRAMES on each
+# side (which also covers the swept mask test) and both whole-frame
+# roundings of the pipe period are checked. Centers with no way on are
+# pruned until none are left.
+#
+# Gaps range over the whole playfield, not just getRandomPipe's band. The
+# table is built once per difficulty and cached in gallery/cache, in a
+# file named after a hash of its parameters (tablePath);
+# SolvablePipes picks each next gap from a precomputed list, so a spawn
+# costs one random number and one index.
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/reach.py" build             (build and cache all tables)
+#   python "Flappy Bird/reach.py" verify --games 200  (check generated games are passable)
+#   python "Flappy Bird/reach.py" verify --pipe-speed 8  (same, with other physics)
+
+CACHE_DIR = 'gallery/cache'
+TABLE_VERSION = 1
+SLACK_FRAMES = 1
+EDGE = 20  # least pipe showing above a gap and above the ground
+EXIT_VELOCITY = (2, 6)  # any band is sound; this one allows the most jumps in the stock difficulties
+
+# How far the generator leans towards big jumps between gaps: 0 always
+# picks the nearest allowed gap, 0.5 picks uniformly, 1 the furthest
+TARGET_HARDNESS = {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.7}
+
+TABLES = {}  # (difficulty, params) -> ReachTable, tables already loaded by this process
+
+
+class StateSpace:
+    # Live (y, velocity) states after a step and the two ways to leave each
+
+    def __init__(self, gravity=GRAVITY, flap_velocity=FLAP_VELOCITY, max_velocity_y=MAX_VELOCITY_Y,
+                 player_height=PLAYER_HEIGHT):
+        if not all(float(value).is_integer() for value in (gravity, flap_velocity, max_velocity_y)):
+            raise ValueError('reachability needs integer gravity, flap_velocity and max_velocity_y')
+        self.ymax = GROUNDY - 25  # Lower down is a crash
+        # Highest point: a flap from y=1, then rising until gravity stops it
+        y, v = 1 + flap_velocity, flap_velocity
+        while v < 0:
+            v += gravity
+            y += v
+        self.ymin = min(y, 1 + flap_velocity)
+        self.vmin = min(flap_velocity, START_VELOCITY_Y)
+        self.vmax = max(max_velocity_y + gravity - 1, START_VELOCITY_Y)
+
+        ys, vs = np.meshgrid(np.arange(self.ymin, self.ymax + 1), np.arange(self.vmin, self.vmax + 1),
+                             indexing='ij')
+        self.y = ys.ravel()
+        self.v = vs.ravel()
+        self.size = self.y.size
+        self.nv = self.vmax - self.vmin + 1
+
+        def successor(y, v):
+            y = y + np.minimum(v, GROUNDY - y - player_height)
+            live = (y <= self.ymax) & (y >= self.ymin)
+            return np.where(live, self.index(np.clip(y, self.ymin, self.ymax), v), self.size)
+
+        glide = np.where(self.v < max_velocity_y, self.v + gravity, self.v)
+        self.glide = successor(self.y, glide)
+        self.flap = np.where(self.y > 0, successor(self.y, np.full_like(self.v, flap_velocity)), self.glide)
+
+    def index(self, y, v):
+        return (y - self.ymin) * self.nv + (v - self.vmin)
+
+    def back(self, states):
+        # States with a step (flap or glide) into 'states'; index size is death
+        padded = np.append(states, False)
+        return padded[self.glide] | padded[self.flap]
+
+    def forward(self, states):
+        nxt = np.zeros(self.size + 1, dtype=bool)
+        nxt[self.glide[states]] = True
+        nxt[self.flap[states]] = True
+        return nxt[:-1]
+
+
+class ReachTable:
+
+    def __init__(self, difficulty, pipe_gap, min_center, start, options):
+        self.difficulty = difficulty
+        self.pipe_gap = pipe_gap
+        self.min_center = min_center
+        self.start = start  # Allowed first gap centers, nearest to the start height first
+        self.options = options  # options[c - min_center]: allowed next centers, nearest first
+
+    def next(self, center):
+        return self.start if center is None else self.options[center - self.min_center]
+
+    def toJSON(self):
+        return {'difficulty': self.difficulty, 'pipe_gap': self.pipe_gap, 'min_center': self.min_center,
+                'start': self.start, 'options': self.options}
+
+    @classmethod
+    def fromJSON(cls, data):
+        return cls(data['difficulty'], data['pipe_gap'], data['min_center'], data['start'], data['options'])
+
+
+def tableParams(difficulty, settings=None):
+    settings = dict(DIFFICULTY_SETTINGS[difficulty] if settings is None else settings)
+    return {'version': TABLE_VERSION, 'slack': SLACK_FRAMES, 'edge': EDGE, 'exit': list(EXIT_VELOCITY),
+            'pipe_gap': settings['pipe_gap'],
+            'pipe_speed': settings['pipe_speed'], 'gravity': settings.get('gravity', GRAVITY),
+            'flap_velocity': settings.get('flap_velocity', FLAP_VELOCITY),
+            'max_velocity_y': settings.get('max_velocity_y', MAX_VELOCITY_Y),
+            'sizes': [PLAYER_WIDTH, PLAYER_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT, BASE_HEIGHT]}
+
+
+def gapCenters(pipe_gap):
+    # Every gap center the generator may use, top to bottom
+    min_center = pipe_gap // 2 + EDGE
+    max_center = max(min_center, SCREENHEIGHT - BASE_HEIGHT - pipe_gap // 2 - EDGE)
+    return np.arange(min_center, max_center + 1)
+
+
+def columnFrames(pipe_speed):
+    # Frames the bird overlaps a column (x in (playerx - PIPE_WIDTH, playerx + PLAYER_WIDTH)), widened
+    return math.ceil((PLAYER_WIDTH + PIPE_WIDTH) / pipe_speed) + 2 * SLACK_FRAMES
+
+
+def framesToLeave(x, pipe_speed):
+    # Steps until the bird is past a column now at x, counting the trailing slack frame
+    return math.ceil((x - (int(SCREENWIDTH / 5) - PIPE_WIDTH)) / pipe_speed) + SLACK_FRAMES
+
+
+def gapStates(space, centers, pipe_gap):
+    # Per center: the states inside the gap, and those of them leaving it well
+    in_gap = np.array([(space.y >= c - pipe_gap // 2) & (space.y + PLAYER_HEIGHT <= c + pipe_gap // 2)
+                       for c in centers])
+    exits = in_gap & (space.v >= EXIT_VELOCITY[0]) & (space.v <= EXIT_VELOCITY[1])
+    return in_gap, exits
+
+
+def buildTable(difficulty, settings=None):
+    params = tableParams(difficulty, settings)
+    space = StateSpace(params['gravity'], params['flap_velocity'], params['max_velocity_y'])
+    pipe_gap, pipe_speed = params['pipe_gap'], params['pipe_speed']
+    centers = gapCenters(pipe_gap)
+    min_center = int(centers[0])
+    column = columnFrames(pipe_speed)
+    period = SCREENWIDTH * 0.8 / pipe_speed
+    periods = sorted({math.floor(period), math.ceil(period)})
+
+    alive = np.ones(space.size, dtype=bool)
+    in_gap, exits = gapStates(space, centers, pipe_gap)
+
+    # Backwards from the end of each column: states one period earlier that make it
+    pre = {n: np.zeros((len(centers), space.size), dtype=bool) for n in periods}
+    # The first column, from the start position: frames until the bird leaves it
+    first_last = framesToLeave(SCREENWIDTH + 200, pipe_speed)
+    first = np.zeros(len(centers), dtype=bool)
+    start = space.index(int(SCREENHEIGHT / 2), START_VELOCITY_Y)
+    for i in range(len(centers)):
+        states = exits[i]
+        for depth in range(1, max(max(periods), first_last) + 1):
+            in_column = depth < column
+            states = space.back(states) & (in_gap[i] if in_column else alive)
+            if depth in pre:
+                pre[depth][i] = states
+            if depth == first_last:
+                first[i] = states[start]
+
+    # c1 -> c2 when every exit state of c1 can make it through c2
+    allowed = np.ones((len(centers), len(centers)), dtype=bool)
+    for n in periods:
+        missing = exits.astype(np.int32) @ (~pre[n]).astype(np.int32).T
+        allowed &= missing == 0
+
+    # Drop centers with no way on until every remaining one has one
+    live = np.ones(len(centers), dtype=bool)
+    while True:
+        keep = live & (allowed[:, live].any(axis=1))
+        if (keep == live).all():
+            break
+        live = keep
+    if not (first & live).any():
+        raise ValueError(f'no passable pipe sequence for {difficulty} {params}')
+
+    def nearest(origin, candidates):
+        return sorted((int(c) for c in candidates), key=lambda c: (abs(c - origin), c))
+
+    options = [nearest(c, centers[allowed[i] & live]) if live[i] else [] for i, c in enumerate(centers)]
+    return ReachTable(difficulty, pipe_gap, min_center,
+                      nearest(int(SCREENHEIGHT / 2), centers[first & live]), options)
+
+
+def paramsHash(params):
+    # Short hash of a table's parameters: each configuration gets a cache file of its own
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def tablePath(difficulty, settings=None, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f'reach-{difficulty}-{paramsHash(tableParams(difficulty, settings))}.json')
+
+
+def loadTable(difficulty, settings=None, cache_dir=CACHE_DIR):
+    # Cached table for these settings, built (and cached) when missing or stale
+    params = tableParams(difficulty, settings)
+    key = (difficulty, json.dumps(params, sort_keys=True))
+    if key in TABLES:
+        return TABLES[key]
+    path = tablePath(difficulty, settings, cache_dir)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('params') == params:
+            TABLES[key] = ReachTable.fromJSON(data)
+            return TABLES[key]
+    except (OSError, ValueError, KeyError):
+        pass
+    table = TABLES[key] = buildTable(difficulty, settings)
+    saveTable(table, settings, cache_dir)
+    return table
+
+
+def saveTable(table, settings=None, cache_dir=CACHE_DIR):
+    # Writes a table built for these settings to the cache loadTable() reads
+    path = tablePath(table.difficulty, settings, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'w') as f:
+            json.dump({'params': tableParams(table.difficulty, settings), **table.toJSON()}, f)
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"Error caching reachability table: {e}")
+
+
+class SolvablePipes:
+    # Streams gap positions from a ReachTable; pass to World(pipe_generator=...)
+
+    def __init__(self, table, hardness=0.5):
+        self.table = table
+        self.hardness = hardness
+        # rng.random() ** exponent skews the pick towards near (>1) or far (<1) gaps
+        self.exponent = (1 - hardness) / hardness if hardness > 0 else math.inf
+        self.center = None
+
+    def reset(self):
+        self.center = None
+
+    def next(self, rng, pipe_height=PIPE_HEIGHT):
+        options = self.table.next(self.center)
+        u = rng.random()
+        pick = u ** self.exponent if self.exponent != math.inf else 0.0
+        self.center = options[min(int(pick * len(options)), len(options) - 1)]
+        gap = self.table.pipe_gap
+        pipeX = SCREENWIDTH + 10
+        return [
+            {'x': pipeX, 'y': self.center - gap // 2 - pipe_height},  # Upper pipe
+            {'x': pipeX, 'y': self.center + gap // 2}                 # Lower pipe
+        ]
+
+
+def solvablePipes(difficulty, settings=None):
+    return SolvablePipes(loadTable(difficulty, settings), TARGET_HARDNESS.get(difficulty, 0.5))
+
+
+def passable(world, max_frames, space=None):
+    # Exact check: follows the world's real pipes frame by frame with the set
+    # of every state the bird could be in; False if the set ever empties
+    space = space or StateSpace(world.gravity, world.flap_velocity, world.max_velocity_y, world.player_height)
+    states = np.zeros(space.size, dtype=bool)
+    states[space.index(int(world.playery), int(world.bird_velocity_y))] = True
+    playerx = world.playerx
+    for _ in range(max_frames):
+        states = space.forward(states)
+        pipes = world.pipes
+        for i in pipes.order:
+            x = pipes.x[i]
+            if playerx + world.player_width > x and playerx < x + world.pipe_width:
+                states &= (space.y >= pipes.gap_top[i]) & (space.y + world.player_height <= pipes.gap_bottom[i])
+        if not states.any():
+            return False
+        # Advance the pipes the way World.step does
+        pipes.move(world.pipe_speed)
+        if pipes.cull(-world.pipe_width):
+            world.spawnPipe(pipes.x[pipes.last()] + world.pipe_spacing)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and check pipe reachability tables")
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('--difficulty', nargs='+', default=list(DIFFICULTY_SETTINGS))
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--frames', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pipe-speed', type=int, help='verify with this pipe speed instead')
+    parser.add_argument('--pipe-gap', type=int, help='verify with this pipe gap instead')
+    args = parser.parse_args()
+
+    for difficulty in args.difficulty:
+        if args.command == 'build':
+            start = time.perf_counter()
+            table = buildTable(difficulty)
+            elapsed = time.perf_counter() - start
+            saveTable(table)
+            counts = [len(options) for options in table.options if options]
+            print(f"{difficulty:>6}: {len(counts)} usable gap centers, {min(counts)}-{max(counts)} next gaps each, "
+                  f"{len(table.start)} first gaps ({elapsed:.2f}s) -> {tablePath(difficulty)}")
+            continue
+
+        settings = dict(DIFFICULTY_SETTINGS[difficulty])
+        if args.pipe_speed:
+            settings['pipe_speed'] = args.pipe_speed
+        if args.pipe_gap:
+            settings['pipe_gap'] = args.pipe_gap
+        table = buildTable(difficulty, settings)
+        # Every center in the table's range, unchecked
+        every = list(range(table.min_center, table.min_center + len(table.options)))
+        uniform = ReachTable(difficulty, table.pipe_gap, table.min_center, every, [every] * len(every))
+        hardness = TARGET_HARDNESS.get(difficulty, 0.5)
+        space = StateSpace()
+        results = []
+        for name, generator in (('getRandomPipe', None), ('uniform', SolvablePipes(uniform)),
+                                ('solvable', SolvablePipes(table, hardness))):
+            rng = random.Random(args.seed)
+            failed = 0
+            for _ in range(args.games):
+                world = World(difficulty, settings=settings, pipe_generator=generator).reset(rng.randrange(2 ** 32))
+                failed += not passable(world, args.frames, space)
+            results.append(f"{name} {failed}/{args.games}")
+        print(f"{difficulty:>6} (gap {settings['pipe_gap']}, speed {settings['pipe_speed']}): "
+              f"impassable within {args.frames} frames: " + ', '.join(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import collections
+import time
+
+import pygame
+
+# Dirty-rectangle renderer.
+#
+# The static part of a screen (background, ground, menu text...) is composed
+# once into a "scene" surface. Each frame only the rectangles that sprites
+# covered last frame are restored from the scene, sprites are drawn, and just
+# the old + new rectangles are pushed with pygame.display.update(rects).
+# With enabled=False every frame blits the whole scene and updates the full
+# window, which is what the game used to do.
+
+# The window lost what it showed (uncovered, restored from minimised)
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
+
+
+def composeNumber(value, glyphs):
+    # One surface with the digit sprites of value laid out left to right
+    digits = [glyphs[int(x)] for x in str(value)]
+    surface = pygame.Surface((sum(d.get_width() for d in digits), max(d.get_height() for d in digits)),
+                             pygame.SRCALPHA)
+    xoffset = 0
+    for digit in digits:
+        # BLEND_RGBA_MAX onto a cleared surface copies the pixels unblended
+        surface.blit(digit, (xoffset, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        xoffset += digit.get_width()
+    return surface
+
+
+class SurfaceCache:
+    # Bounded LRU cache of pre-rendered text and score surfaces. A miss
+    # means a FONT.render or a digit composition happened.
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = build()
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def text(self, font, text, color, antialias=True):
+        return self.get(('text', font, text, color, antialias), lambda: font.render(text, antialias, color))
+
+    def number(self, value, glyphs):
+        return self.get(('number', glyphs, value), lambda: composeNumber(value, glyphs))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.surfaces)}
+
+    def resetStats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def mergeRects(rects):
+    # Union overlapping rectangles so a sprite that moved a few pixels is
+    # pushed once instead of as two nearly identical rects
+    merged = []
+    for rect in rects:
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect = rect.union(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+
+    def __init__(self, screen, enabled=True):
+        self.screen = screen
+        self.enabled = enabled
+        self.scene = None
+        self.foreground = None
+        self.drawn = []
+        self.dirty = []
+        self.full_redraw = True
+
+        # Frame-time and fill-rate statistics
+        self.frames = 0
+        self.frame_time = 0.0
+        self.pixels = 0
+        self.frame_start = 0.0
+
+    def setScene(self, scene, foreground=None):
+        # foreground is the area of the scene drawn over 'behind' sprites,
+        # e.g. the ground in front of the pipes
+        self.scene = scene
+        self.foreground = foreground
+        self.drawn = []
+        self.full_redraw = True
+
+    def handleEvent(self, event):
+        # True if event means the whole window has to be redrawn; the next
+        # frame then pushes all of it
+        if event.type in EXPOSE_EVENTS:
+            self.full_redraw = True
+            return True
+        return False
+
+    def begin(self):
+        self.frame_start = time.perf_counter()
+        if self.full_redraw or not self.enabled:
+            self.screen.blit(self.scene, (0, 0))
+        else:
+            for rect in self.drawn:
+                self.screen.blit(self.scene, rect, rect)
+        self.dirty = self.drawn
+        self.drawn = []
+
+    def blit(self, surface, pos, behind=False):
+        rect = self.screen.blit(surface, pos)
+        if behind and self.foreground is not None:
+            covered = rect.clip(self.foreground)
+            if covered:
+                self.screen.blit(self.scene, covered, covered)
+        if rect:
+            self.drawn.append(rect)
+        return rect
+
+    def blits(self, sequence, bounds):
+        # Many sprites in one Surface.blits call, tracked as one dirty rect;
+        # bounds must cover all of them
+        self.screen.blits(sequence, doreturn=False)
+        rect = pygame.Rect(bounds).clip(self.screen.get_rect())
+        if rect:
+            self.drawn.append(rect)
+        return rect
+
+    def present(self):
+        if self.full_redraw or not self.enabled:
+            pygame.display.update()
+            self.pixels += self.screen.get_width() * self.screen.get_height()
+            self.full_redraw = False
+        else:
+            rects = mergeRects(self.dirty + self.drawn)
+            pygame.display.update(rects)
+            self.pixels += sum(rect.w * rect.h for rect in rects)
+        self.frames += 1
+        self.frame_time += time.perf_counter() - self.frame_start
+
+    def stats(self):
+        frames = max(self.frames, 1)
+        return {'frames': self.frames,
+                'ms_per_frame': 1000 * self.frame_time / frames,
+                'pixels_per_frame': self.pixels / frames}
+
+    def resetStats(self):
+        self.frames = 0
+        self.frame_time = 0.0
+        self.pixels = 0
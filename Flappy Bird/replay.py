@@ -0,0 +1,325 @@
+import os
+import struct
+import sys
+import time
+
+from config import PLAYER, PIPE
+from engine import World, DIFFICULTY_SETTINGS
+
+# Recorded games and the replay player.
+#
+# A replay holds everything needed to re-run a game: the pipe seed, the
+# difficulty, the collision test, the pipe generator and the frames on
+# which a flap was pressed, plus the final score and death frame to check
+# against.
+#
+# File layout (little-endian):
+#   header  magic 'FBRP', version u8, collision u8, pipes u8, seed u64,
+#           frames u32, score u32, flap count u32, difficulty length u8
+#           (version 1 has no pipes byte: getRandomPipe)
+#   body    difficulty name (utf-8), then flap frames as LEB128 varints,
+#           each one the gap to the previous flap frame
+#
+# Usage (from the repo root):
+#   python "Flappy Bird/main_2.py" --record replays          (record games)
+#   python "Flappy Bird/replay.py" verify replays            (headless, full speed)
+#   python "Flappy Bird/replay.py" play replays/<file>.fbr   (rendered at game speed)
+#   python "Flappy Bird/replay.py" generate replays --games 1000
+
+MAGIC = b'FBRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBQIIIB')
+HEADER_V1 = struct.Struct('<4sBBQIIIB')
+EXTENSION = '.fbr'
+
+# Collision tests a game can be recorded with
+BOX, MASK, MASK_SWEPT = 0, 1, 2
+
+COLLIDERS = {}
+
+# Pipe generators: getRandomPipe, or reach.SolvablePipes stored as
+# 1 + hardness in percent
+RANDOM_PIPES = 0
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class Replay:
+
+    def __init__(self, seed, difficulty, flaps, frames=0, score=0, collision=BOX, pipes=RANDOM_PIPES):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.flaps = list(flaps)
+        self.frames = frames
+        self.score = score
+        self.collision = collision
+        self.pipes = pipes
+
+    @classmethod
+    def fromWorld(cls, world, flaps):
+        return cls(world.seed, world.difficulty, flaps, world.frame, world.score, collisionOf(world.collider),
+                   pipesOf(world.pipe_generator))
+
+    def encode(self):
+        name = self.difficulty.encode('utf-8')
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.collision, self.pipes, self.seed,
+                                    self.frames, self.score, len(self.flaps), len(name)))
+        out += name
+        last = 0
+        for frame in self.flaps:
+            delta = frame - last
+            last = frame
+            while delta >= 0x80:
+                out.append(delta & 0x7f | 0x80)
+                delta >>= 7
+            out.append(delta)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        if len(data) < HEADER_V1.size:
+            raise ReplayError('replay is truncated')
+        magic, version = data[:4], data[4]
+        if magic != MAGIC:
+            raise ReplayError('not a replay file')
+        if version == 1:
+            header = HEADER_V1
+            _, _, collision, seed, frames, score, count, length = header.unpack_from(data)
+            pipes = RANDOM_PIPES
+        elif version == VERSION:
+            header = HEADER
+            if len(data) < header.size:
+                raise ReplayError('replay is truncated')
+            _, _, collision, pipes, seed, frames, score, count, length = header.unpack_from(data)
+        else:
+            raise ReplayError(f'unsupported replay version {version}')
+        pos = header.size
+        difficulty = data[pos:pos + length].decode('utf-8')
+        pos += length
+
+        flaps = []
+        frame = 0
+        try:
+            for _ in range(count):
+                delta = shift = 0
+                while True:
+                    byte = data[pos]
+                    pos += 1
+                    delta |= (byte & 0x7f) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                frame += delta
+                flaps.append(frame)
+        except IndexError:
+            raise ReplayError('replay is truncated') from None
+        return cls(seed, difficulty, flaps, frames, score, collision, pipes)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
+
+
+def collisionOf(collider):
+    if collider is None:
+        return BOX
+    return MASK_SWEPT if collider.swept else MASK
+
+
+def pipesOf(generator):
+    if generator is None:
+        return RANDOM_PIPES
+    return 1 + round(generator.hardness * 100)
+
+
+def loadPipes(replay):
+    # A fresh pipe generator like the one the game was recorded with
+    return pipeGenerator(replay.pipes, replay.difficulty)
+
+
+def pipeGenerator(pipes, difficulty):
+    # The generator a pipesOf() code stands for; None for getRandomPipe
+    if pipes == RANDOM_PIPES:
+        return None
+    import reach
+    return reach.SolvablePipes(reach.loadTable(difficulty), (pipes - 1) / 100)
+
+
+def recordPath(directory, replay):
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{replay.difficulty}-{replay.seed:x}{EXTENSION}"
+    return os.path.join(directory, name)
+
+
+class ReplayWorld(World):
+    # Plays the recorded flaps whatever input step() is given
+
+    def __init__(self, replay, **kwargs):
+        self.replay = replay
+        self.flap_frames = set(replay.flaps)
+        kwargs.setdefault('pipe_generator', loadPipes(replay))
+        super().__init__(replay.difficulty, **kwargs)
+
+    def reset(self, seed=None):
+        return super().reset(self.replay.seed)
+
+    def step(self, flap=False):
+        return super().step(self.frame + 1 in self.flap_frames)
+
+
+def loadCollider(collision):
+    # Masks for headless replays come straight from the sprite files
+    if collision == BOX:
+        return None
+    if collision not in COLLIDERS:
+        import pygame
+        from collision import MaskCollider
+        collider = MaskCollider(swept=collision == MASK_SWEPT)
+        pipe = pygame.image.load(PIPE)
+        collider.setSprites(pygame.image.load(PLAYER), pygame.transform.rotate(pipe, 180), pipe)
+        COLLIDERS[collision] = collider
+    return COLLIDERS[collision]
+
+
+def simulate(replay, collider=None):
+    # Re-run a replay headless; stops one frame past the recorded death
+    world = ReplayWorld(replay, collider=collider)
+    step = world.step
+    limit = replay.frames + 1
+    while not world.crashed and world.frame < limit:
+        step()
+    return world
+
+
+def check(replay, world):
+    # Differences between a re-run and the recorded result, empty if none
+    problems = []
+    if not world.crashed:
+        problems.append(f'still alive at frame {world.frame}, recorded death at {replay.frames}')
+    elif world.frame != replay.frames:
+        problems.append(f'died at frame {world.frame}, recorded {replay.frames}')
+    if world.score != replay.score:
+        problems.append(f'scored {world.score}, recorded {replay.score}')
+    return problems
+
+
+def replayFiles(paths):
+    import glob  # Command line only; replay is imported by the game
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*' + EXTENSION))))
+        else:
+            files.append(path)
+    return files
+
+
+def verify(paths, verbose=False):
+    files = replayFiles(paths)
+    failed = frames = 0
+    start = time.perf_counter()
+    for path in files:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            failed += 1
+            print(f"{path}: {e}")
+            continue
+        world = simulate(replay, loadCollider(replay.collision))
+        frames += world.frame
+        problems = check(replay, world)
+        if problems:
+            failed += 1
+            print(f"{path}: " + '; '.join(problems))
+        elif verbose:
+            print(f"{path}: ok, score {replay.score} at frame {replay.frames}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(files) - failed}/{len(files)} replays match, {frames:,} frames in {elapsed:.2f}s "
+          f"({frames / max(elapsed, 1e-9):,.0f} frames/s, {len(files) / max(elapsed, 1e-9):,.0f} runs/s)")
+    return failed == 0
+
+
+def play(path):
+    # Render a replay through mainGame() at normal speed
+    import tempfile
+    import main_2
+    from scores import ScoreStore
+
+    replay = Replay.load(path)
+    main_2.SCORES = ScoreStore(tempfile.mkdtemp())
+    main_2.RECORD_DIR = None
+    main_2.loadAssets()
+    main_2.difficulty = replay.difficulty
+    worlds = []
+
+    def newWorld():
+        collider = main_2.COLLIDER if replay.collision == collisionOf(main_2.COLLIDER) else loadCollider(replay.collision)
+        world = ReplayWorld(replay,
+                            player_size=main_2.GAME_SPRITES['player'].get_size(),
+                            pipe_size=main_2.GAME_SPRITES['pipe'][0].get_size(),
+                            base_height=main_2.GAME_SPRITES['base'].get_height(),
+                            collider=collider)
+        worlds.append(world)
+        return world
+    main_2.newWorld = newWorld
+    main_2.mainGame()
+
+    problems = check(replay, worlds[-1])
+    print(f"{path}: " + ('; '.join(problems) if problems else f"ok, score {replay.score} at frame {replay.frames}"))
+    return not problems
+
+
+def generate(directory, games, difficulties, seed):
+    # Archive bot games (calibrate's noisy policy) to regression-test against
+    from calibrate import noisyPolicy
+
+    os.makedirs(directory, exist_ok=True)
+    for difficulty in difficulties:
+        for game in range(seed, seed + games):
+            world = World(difficulty).reset(game)
+            policy = noisyPolicy(game)
+            flaps = []
+            while not world.crashed:
+                flap = policy(world)
+                world.step(flap)
+                if flap:
+                    flaps.append(world.frame)
+            replay = Replay.fromWorld(world, flaps)
+            replay.save(os.path.join(directory, f"bot-{difficulty}-{game}{EXTENSION}"))
+    print(f"{games * len(difficulties)} replays -> {directory}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify, play and generate recorded games")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('verify', help='re-simulate replays headless and check score and death frame')
+    command.add_argument('paths', nargs='+', help='replay files or directories')
+    command.add_argument('-v', '--verbose', action='store_true')
+    command = commands.add_parser('play', help='render a replay at game speed')
+    command.add_argument('path')
+    command = commands.add_parser('generate', help='record bot games')
+    command.add_argument('directory')
+    command.add_argument('--games', type=int, default=1000, help='games per difficulty')
+    command.add_argument('--difficulty', nargs='+', default=list(DIFFICULTY_SETTINGS))
+    command.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        sys.exit(0 if verify(args.paths, args.verbose) else 1)
+    elif args.command == 'play':
+        sys.exit(0 if play(args.path) else 1)
+    else:
+        generate(args.directory, args.games, args.difficulty, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import sys
+import time
+
+import pygame
+from pygame.locals import QUIT
+
+# One loop for every screen of the game.
+#
+# Each screen is a Scene; the SceneManager runs whichever is current and
+# switches between them by name. A frame is: events, update, draw,
+# present, wait. Animated scenes (gameplay) run every frame and pace
+# themselves in wait(). Static scenes (menus) sleep until an event or
+# their timeout() comes, and are only drawn again when something set their
+# dirty flag, so an untouched menu costs next to no CPU.
+#
+# pygame 2's event.wait() is a 1 ms polling loop and kept a core busier
+# than the old 32 FPS menus did, so static scenes sleep in IDLE_POLL steps
+# and check for events in between instead.
+
+IDLE_POLL = 1 / 30  # seconds between event checks of a sleeping scene, about the old menu frame time
+OVERLAY_REFRESH = 0.25  # seconds; how often a static scene wakes up while the F3 overlay shows
+
+
+class Scene:
+    name = None
+    static = False
+
+    def __init__(self):
+        self.manager = None
+        self.dirty = True
+
+    def enter(self, **kwargs):
+        # Called with the switch's arguments each time the scene becomes current
+        pass
+
+    def exit(self):
+        pass
+
+    def timeout(self):
+        # Seconds a static scene may sleep before update() must run; None for no limit
+        return None
+
+    def events(self, timeout=None):
+        # The frame's events; with a timeout, sleep until there are some or it runs out
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            events = pygame.event.get()
+            if events or deadline is None:
+                return events
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                return events
+            time.sleep(min(left, IDLE_POLL))
+
+    def handleEvent(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def draw(self):
+        pass
+
+    def present(self):
+        pass
+
+    def wait(self):
+        pass
+
+
+class SceneManager:
+
+    def __init__(self, profiler=None):
+        self.scenes = {}
+        self.scene = None
+        self.pending = None
+        # Static scenes sleep between events; off, they poll (scripted benchmarks)
+        self.block = True
+        # Static scenes draw every frame, like the menus before the scene
+        # manager (with block off: bench_suite.py, bench_idle.py --loop old)
+        self.redraw = False
+        self.profiler = profiler
+
+    def add(self, *scenes):
+        for scene in scenes:
+            scene.manager = self
+            self.scenes[scene.name] = scene
+
+    def switch(self, name, **kwargs):
+        # Takes effect when the current frame ends; None leaves run()
+        self.pending = (name, kwargs)
+
+    def run(self, name, stop=None, **kwargs):
+        # Runs scenes starting with 'name'. Returns (name, kwargs) of the
+        # switch that ends it: to None, or one for which stop(name, kwargs) is true
+        self.switch(name, **kwargs)
+        while True:
+            if self.pending is not None:
+                name, kwargs = self.pending
+                self.pending = None
+                if name is None or (stop is not None and stop(name, kwargs)):
+                    return name, kwargs
+                if self.scene is not None:
+                    self.scene.exit()
+                self.scene = self.scenes[name]
+                self.scene.dirty = True
+                self.scene.enter(**kwargs)
+                continue
+            self.frame()
+
+    def frame(self):
+        scene = self.scene
+        profiler = self.profiler
+        profiler.beginFrame(scene.name)
+        timeout = None
+        if scene.static and self.block and not scene.dirty:
+            timeout = scene.timeout()
+            if profiler.show:
+                timeout = OVERLAY_REFRESH if timeout is None else min(timeout, OVERLAY_REFRESH)
+            if timeout is None:
+                timeout = float('inf')
+        events = scene.events(timeout)
+        if timeout is not None:
+            profiler.mark('wait')
+
+        for event in events:
+            if profiler.handleEvent(event):
+                scene.dirty = True
+                continue
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+            scene.handleEvent(event)
+            if self.pending is not None:
+                return
+        profiler.mark('events')
+
+        scene.update()
+        if self.pending is not None:
+            return
+        if scene.dirty or not scene.static or profiler.show or self.redraw:
+            scene.draw()
+            profiler.mark('draw')
+            scene.present()
+            profiler.mark('present')
+            scene.dirty = False
+        scene.wait()
+        profiler.mark('wait')
+        profiler.endFrame()
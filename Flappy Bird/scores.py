@@ -0,0 +1,167 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+# High score leaderboards, one per difficulty.
+#
+# Each board is read from disk once, the first time it is needed, and kept
+# in memory; add() ranks a score immediately and hands the write to a
+# background thread, so the game never waits on the disk. A write takes a
+# lock file, merges the board on disk (other game processes may share the
+# directory) with the one in memory, and replaces the file atomically
+# through a temporary file. Pending writes are flushed at exit.
+
+TOP_N = 10
+LOCK_TIMEOUT = 5  # seconds to wait for another process's lock
+LOCK_STALE = 30  # seconds after which a lock left by a dead process is removed
+
+
+class FileLock:
+    # Cross-process lock: whoever creates the lock file holds it
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT, stale=LOCK_STALE):
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.path.getmtime(self.path) > self.stale:
+                    os.remove(self.path)
+                    continue
+            except OSError:
+                continue  # Released in the meantime
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'{self.path} is locked')
+            time.sleep(0.01)
+
+    def __exit__(self, *exc):
+        os.remove(self.path)
+
+
+def rankKey(entry):
+    # Highest score first; on a tie the earlier score keeps its place
+    return -entry['score'], entry['time']
+
+
+def mergeEntries(a, b, top_n=TOP_N):
+    entries = {(entry['score'], entry['time']): entry for entry in a + b}
+    return sorted(entries.values(), key=rankKey)[:top_n]
+
+
+class ScoreStore:
+
+    def __init__(self, directory='.', top_n=TOP_N, legacy_file=None, legacy_difficulty=None):
+        # legacy_file: the old single high_score.txt, used as the starting
+        # best of legacy_difficulty until that difficulty has a board of its
+        # own; the other difficulties start empty
+        self.directory = directory
+        self.top_n = top_n
+        self.legacy_file = legacy_file
+        self.legacy_difficulty = legacy_difficulty
+        self.boards = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.counters = {'writes': 0, 'failed': 0}
+
+    def path(self, difficulty):
+        return os.path.join(self.directory, f'high_scores-{difficulty}.json')
+
+    def readFile(self, path):
+        try:
+            with open(path) as f:
+                return [{'score': int(entry['score']), 'time': float(entry['time'])} for entry in json.load(f)]
+        except (OSError, ValueError, TypeError, KeyError):
+            return []
+
+    def readLegacy(self):
+        try:
+            with open(self.legacy_file) as f:
+                return [{'score': int(f.read()), 'time': os.path.getmtime(self.legacy_file)}]
+        except (OSError, ValueError):
+            return []
+
+    def board(self, difficulty):
+        with self.lock:
+            if difficulty not in self.boards:
+                path = self.path(difficulty)
+                if (os.path.exists(path) or self.legacy_file is None
+                        or difficulty != self.legacy_difficulty):
+                    entries = self.readFile(path)
+                else:
+                    entries = self.readLegacy()
+                self.boards[difficulty] = mergeEntries(entries, [], self.top_n)
+            return list(self.boards[difficulty])
+
+    def best(self, difficulty):
+        board = self.board(difficulty)
+        return board[0]['score'] if board else 0
+
+    def add(self, difficulty, score, when=None):
+        # Returns the score's 0-based rank, or None if it missed the board
+        entry = {'score': score, 'time': time.time() if when is None else when}
+        self.board(difficulty)
+        with self.lock:
+            board = mergeEntries(self.boards[difficulty], [entry], self.top_n)
+            self.boards[difficulty] = board
+        if entry not in board:
+            return None
+        self.save(difficulty)
+        return board.index(entry)
+
+    def save(self, difficulty):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.writer, name='score-writer', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+        self.queue.put(difficulty)
+
+    def writer(self):
+        while True:
+            difficulty = self.queue.get()
+            try:
+                self.write(difficulty)
+                self.counters['writes'] += 1
+            except Exception as e:  # Also bad data (json's ValueError/TypeError): the thread must outlive it
+                self.counters['failed'] += 1
+                print(f"Error saving high scores: {e}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, difficulty):
+        path = self.path(difficulty)
+        os.makedirs(self.directory, exist_ok=True)
+        with FileLock(path + '.lock'):
+            on_disk = self.readFile(path)
+            with self.lock:
+                board = mergeEntries(on_disk, self.boards[difficulty], self.top_n)
+            temp = f'{path}.{os.getpid()}.tmp'
+            with open(temp, 'w') as f:
+                json.dump(board, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, path)
+        with self.lock:
+            # Keep what other processes added since we last looked
+            self.boards[difficulty] = mergeEntries(self.boards[difficulty], board, self.top_n)
+
+    def flush(self):
+        # Block until every queued write is on disk
+        if self.thread is not None:
+            self.queue.join()
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['pending'] = self.queue.unfinished_tasks
+        return stats
@@ -0,0 +1,72 @@
+# Fixed-timestep accumulator. The simulation always advances in steps of
+# 1/step_rate seconds, however fast or slow frames are rendered; the
+# renderer draws in between steps using alpha (0..1) as interpolation
+# factor.
+
+
+class FixedTimestep:
+
+    def __init__(self, step_rate, max_steps=5, lockstep=False):
+        self.dt = 1.0 / step_rate
+        # Steps run per frame at most; time beyond that is dropped so one
+        # long stall cannot snowball into ever longer catch-up frames
+        self.max_steps = max_steps
+        # Exactly one step per frame, for benchmarks and replays
+        self.lockstep = lockstep
+        self.accumulator = 0.0
+
+        self.frames = 0
+        self.steps = 0
+        self.late_frames = 0
+        self.dropped_steps = 0
+        self.pulled_steps = 0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, elapsed, budget=None):
+        # elapsed: seconds since the previous frame; budget: target frame
+        # time. Returns how many simulation steps to run this frame.
+        self.frames += 1
+        if self.lockstep:
+            self.steps += 1
+            return 1
+        if budget and elapsed > budget * 1.5:
+            self.late_frames += 1
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.dt)
+        self.accumulator -= steps * self.dt
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+        self.steps += steps
+        return steps
+
+    def pull(self):
+        # Take the next step now instead of when it is due, e.g. to apply a
+        # flap at once. The schedule is unchanged: the step after it waits
+        # that much longer, so the game does not speed up. Only one step can
+        # be ahead of schedule at a time.
+        if self.lockstep or self.accumulator < 0:
+            return False
+        self.accumulator -= self.dt
+        self.steps += 1
+        self.pulled_steps += 1
+        return True
+
+    @property
+    def alpha(self):
+        if self.lockstep:
+            return 1.0
+        return max(self.accumulator, 0.0) / self.dt
+
+    def stats(self):
+        return {'frames': self.frames, 'steps': self.steps, 'late_frames': self.late_frames,
+                'dropped_steps': self.dropped_steps, 'pulled_steps': self.pulled_steps}
+
+    def resetStats(self):
+        self.frames = 0
+        self.steps = 0
+        self.late_frames = 0
+        self.dropped_steps = 0
+        self.pulled_steps = 0